@@ -41,7 +41,7 @@ def main():
         print("Development in progress...")
         
     except Exception as e:
-        logger.error(f"Error starting application: {e}", exc_info=True)
+        logger.exception("Error starting application: %s", e)
         return 1
     
     return 0
@@ -32,6 +32,15 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=requirements,
+    extras_require={
+        # Optional speedups; every module falls back to the standard library
+        "speedups": [
+            "orjson>=3.8.0",
+            "msgpack>=1.0.0",
+            "pyahocorasick>=2.0.0",
+            "jsonschema>=4.0.0",
+        ],
+    },
     entry_points={
         "console_scripts": [
             "gemini-function-manager=main:main",
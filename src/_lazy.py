@@ -0,0 +1,38 @@
+"""
+Lazy module loading helpers.
+
+This module provides helpers for deferring the execution of a module's
+code until one of its attributes is first accessed.
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+def lazy_module(fqname: str) -> ModuleType:
+    """
+    Import a module lazily.
+    
+    The module object is created and registered in sys.modules right away,
+    but its code only runs on first attribute access.
+    
+    Args:
+        fqname: The fully qualified name of the module.
+        
+    Returns:
+        The (possibly not yet executed) module.
+    """
+    module = sys.modules.get(fqname)
+    if module is not None:
+        return module
+    
+    spec = importlib.util.find_spec(fqname)
+    if spec is None:
+        raise ImportError(f"No module named {fqname!r}", name=fqname)
+    
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[fqname] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,399 @@
+"""
+Sandbox worker processes.
+
+This module provides the pool of warm Python worker processes used by the
+local executor and the simulation sandbox to run untrusted function code.
+"""
+
+import json
+import logging
+import os
+import select
+import struct
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Deque, List, Optional, Sequence
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+if orjson is not None:
+    def _dumps(obj: Any) -> bytes:
+        """Serialize an object to UTF-8 encoded JSON."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    
+    _loads = orjson.loads
+else:
+    def _dumps(obj: Any) -> bytes:
+        """Serialize an object to UTF-8 encoded JSON."""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+    
+    _loads = json.loads
+
+# Length prefix of the frames exchanged with workers, and the largest reply
+# accepted; a longer length means the stream is corrupt
+_FRAME_HEADER = struct.Struct("<I")
+_MAX_RESPONSE_SIZE = 64 * 1024 * 1024
+
+# Bytes read from a worker's stdout per call
+_READ_CHUNK_SIZE = 64 * 1024
+
+# Seconds a worker may take past a job's timeout to report it; a worker that
+# does not answer by then is killed
+_REPLY_GRACE = 5.0
+
+# Program run by each worker. The worker itself only ever runs this trusted
+# code: it reads jobs {"id", "code", "name", "args", "timeout"} as length-
+# prefixed JSON frames and forks a fresh child for each one, so no module,
+# builtin, thread or other state left behind by one function is seen by the
+# next. The child runs the function, capturing what it prints through
+# sys.stdout and sys.stderr, and writes its result to a pipe of its own; it
+# never holds the protocol descriptors. The worker kills the child's process
+# group once the result is in, when the job's timeout passes or when the
+# child dies, and replies {"id", "status", "exit_code", "response"}.
+# Descriptors 0-2 point at /dev/null, so nothing written to fd 1 or read
+# from fd 0 (including by child processes) reaches the protocol.
+_WORKER_PROGRAM = """
+import io
+import json
+import os
+import select
+import signal
+import struct
+import sys
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+
+try:
+    import orjson
+    def dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    def dumps(obj):
+        return json.dumps(obj).encode()
+
+header = struct.Struct("<I")
+max_result_size = %d
+
+requests = os.fdopen(os.dup(0), "rb")
+responses = os.dup(1)
+devnull = os.open(os.devnull, os.O_RDWR)
+for fd in (0, 1, 2):
+    os.dup2(devnull, fd)
+os.close(devnull)
+
+def write_all(fd, data):
+    data = memoryview(data)
+    while data:
+        data = data[os.write(fd, data):]
+
+def run(job, result_fd):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    start_time = time.time()
+    try:
+        namespace = {"__name__": "__sandbox__"}
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            exec(job["code"], namespace)
+            result = namespace[job["name"]](**job["args"])
+        response = {"success": True, "result": result, "error": None}
+    except BaseException as e:
+        response = {"success": False, "result": None, "error": str(e), "traceback": traceback.format_exc()}
+    response["execution_time"] = time.time() - start_time
+    response["stdout"] = stdout.getvalue()
+    response["stderr"] = stderr.getvalue()
+    try:
+        output = dumps(response)
+    except (TypeError, ValueError) as e:
+        response.update(success=False, result=None, error=f"Function result is not JSON serializable: {e}")
+        output = dumps(response)
+    write_all(result_fd, header.pack(len(output)) + output)
+
+def read_result(fd, deadline):
+    data = bytearray()
+    while True:
+        if len(data) >= header.size:
+            size = header.unpack_from(data)[0]
+            if size > max_result_size:
+                return None
+            if len(data) >= header.size + size:
+                return bytes(data[header.size:header.size + size])
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+            raise TimeoutError
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            return None
+        data += chunk
+
+while True:
+    head = requests.read(header.size)
+    if len(head) < header.size:
+        break
+    job = json.loads(requests.read(header.unpack(head)[0]))
+    deadline = time.monotonic() + job["timeout"]
+    result_r, result_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.setpgid(0, 0)
+            os.close(result_r)
+            os.close(responses)
+            requests.close()
+            del requests, responses
+            run(job, result_w)
+            os._exit(0)
+        finally:
+            os._exit(1)
+    
+    try:
+        os.setpgid(pid, pid)
+    except OSError:
+        pass
+    os.close(result_w)
+    try:
+        output = read_result(result_r, deadline)
+        status = b"crashed" if output is None else b"ok"
+    except TimeoutError:
+        output, status = None, b"timeout"
+    os.close(result_r)
+    
+    for kill in (os.killpg, os.kill):
+        try:
+            kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+    exit_code = os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+    
+    reply = b'{"id":%%d,"status":"%%s","exit_code":%%d,"response":%%s}' %% (
+        job["id"], status, exit_code, b"null" if output is None else output
+    )
+    write_all(responses, header.pack(len(reply)) + reply)
+""" % _MAX_RESPONSE_SIZE
+
+def _write_all(fd: int, data: bytes):
+    """
+    Write all of the data to a pipe.
+    
+    A frame that fits in the pipe buffer goes out in a single write call.
+    
+    Args:
+        fd: The pipe's file descriptor.
+        data: The data to write.
+    """
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def _read_exactly(fd: int, size: int, deadline: float) -> Optional[bytes]:
+    """
+    Read a number of bytes from a pipe, waiting at most until a deadline.
+    
+    Args:
+        fd: The pipe's file descriptor.
+        size: The number of bytes to read.
+        deadline: The time.monotonic() value to give up at.
+    
+    Returns:
+        The bytes read, or None if the pipe was closed first.
+    
+    Raises:
+        TimeoutError: If the deadline passed first.
+    """
+    data = bytearray()
+    while len(data) < size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+            raise TimeoutError
+        chunk = os.read(fd, min(size - len(data), _READ_CHUNK_SIZE))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+class SandboxWorkerPool:
+    """
+    Pool of warm Python worker processes that run functions in forked children.
+    
+    Workers are started on demand, up to the pool size, and reused for later
+    jobs, so interpreter start-up is paid once per worker. Each job runs in
+    a child forked from an idle worker and discarded afterwards, so jobs
+    never see each other's state. A worker that stops answering, dies or
+    sends a malformed reply is discarded, freeing its slot for a replacement.
+    """
+    
+    def __init__(self, size: Optional[int] = None, command_prefix: Sequence[str] = ()):
+        """
+        Initialize the worker pool.
+        
+        Args:
+            size: Maximum number of worker processes, and so of jobs run at
+                  once; defaults to the number of CPUs.
+            command_prefix: Command the workers are started under, e.g. a
+                            sandboxing tool.
+        """
+        self._size = size or os.cpu_count() or 1
+        self._command = list(command_prefix) + [sys.executable, "-c", _WORKER_PROGRAM]
+        
+        # One slot per worker that may be running a job; idle workers hold
+        # none. Every worker taken by _acquire gives its slot back through
+        # _release or _discard
+        self._slots = threading.BoundedSemaphore(self._size)
+        self._idle: Deque[subprocess.Popen] = deque()
+        self._workers: List[subprocess.Popen] = []
+        self._lock = threading.Lock()
+        self._next_job_id = 0
+    
+    def _acquire(self) -> subprocess.Popen:
+        """
+        Take an idle worker, starting a new one if none is idle.
+        
+        Blocks while the pool size worth of workers are busy.
+        
+        Returns:
+            A running worker process.
+        """
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    worker = self._idle.popleft() if self._idle else None
+                    if worker is None:
+                        worker = subprocess.Popen(
+                            self._command,
+                            stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL,
+                            bufsize=0
+                        )
+                        self._workers.append(worker)
+                        logger.debug(f"Started sandbox worker (pid {worker.pid})")
+                        return worker
+                
+                if worker.poll() is None:
+                    return worker
+                self._remove(worker)
+        except BaseException:
+            self._slots.release()
+            raise
+    
+    def _release(self, worker: subprocess.Popen):
+        """
+        Return a worker taken by _acquire to the idle workers.
+        
+        Args:
+            worker: The worker process to return.
+        """
+        with self._lock:
+            self._idle.append(worker)
+        self._slots.release()
+    
+    def _discard(self, worker: subprocess.Popen):
+        """
+        Kill a worker taken by _acquire and remove it from the pool.
+        
+        Args:
+            worker: The worker process to discard.
+        """
+        self._remove(worker)
+        self._slots.release()
+    
+    def _remove(self, worker: subprocess.Popen):
+        """
+        Kill a worker and forget it.
+        
+        Args:
+            worker: The worker process to remove.
+        """
+        if worker.poll() is None:
+            worker.kill()
+        worker.wait()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+    
+    def run(self, function_code: str, function_name: str, args: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """
+        Run a function in a fresh child of a worker process.
+        
+        Args:
+            function_code: The Python code implementing the function.
+            function_name: The name of the function to run.
+            args: The arguments to pass to the function.
+            timeout: Maximum execution time in seconds.
+        
+        Returns:
+            The function's response, with "success", "result", "error",
+            "execution_time", "stdout" and "stderr" entries, and a
+            "traceback" entry if the function raised.
+        
+        Raises:
+            subprocess.TimeoutExpired: If the function exceeded the timeout.
+            RuntimeError: If the function's process died while running it,
+                or the worker died or sent a malformed reply.
+        """
+        with self._lock:
+            self._next_job_id += 1
+            job_id = self._next_job_id
+        job = _dumps({"id": job_id, "code": function_code, "name": function_name, "args": args, "timeout": timeout})
+        worker = self._acquire()
+        
+        try:
+            _write_all(worker.stdin.fileno(), _FRAME_HEADER.pack(len(job)) + job)
+            
+            # The worker enforces the timeout; only a stuck worker hits this
+            deadline = time.monotonic() + timeout + _REPLY_GRACE
+            fd = worker.stdout.fileno()
+            reply = None
+            header = _read_exactly(fd, _FRAME_HEADER.size, deadline)
+            if header is not None:
+                size = _FRAME_HEADER.unpack(header)[0]
+                if size > _MAX_RESPONSE_SIZE:
+                    self._discard(worker)
+                    raise RuntimeError(f"Sandbox worker sent an invalid frame length ({size} bytes)")
+                reply = _read_exactly(fd, size, deadline)
+        except TimeoutError:
+            self._discard(worker)
+            raise subprocess.TimeoutExpired(worker.args, timeout)
+        except (BrokenPipeError, OSError):
+            reply = None
+        
+        if reply is None:
+            self._discard(worker)
+            raise RuntimeError(f"Sandbox worker exited with code {worker.returncode}")
+        
+        # A reply that does not parse or answers another job means the
+        # stream is out of step; the worker cannot be used again
+        try:
+            output = _loads(reply)
+        except ValueError:
+            output = None
+        if not isinstance(output, dict) or output.get("id") != job_id:
+            self._discard(worker)
+            raise RuntimeError("Sandbox worker sent a malformed response")
+        
+        self._release(worker)
+        
+        status = output.get("status")
+        if status == "timeout":
+            raise subprocess.TimeoutExpired(worker.args, timeout)
+        if status != "ok" or not isinstance(output.get("response"), dict):
+            raise RuntimeError(f"Function process exited with code {output.get('exit_code')}")
+        return output["response"]
+    
+    def shutdown(self):
+        """Stop all worker processes."""
+        with self._lock:
+            workers, self._workers = self._workers, []
+            self._idle.clear()
+        for worker in workers:
+            if worker.poll() is None:
+                worker.kill()
+            worker.wait()
@@ -5,17 +5,88 @@ This module collects and analyzes usage statistics, performance metrics,
 and execution logs for the application.
 """
 
+import atexit
+import gzip
+import heapq
 import json
 import logging
+import math
 import os
+import queue
+import re
+import sqlite3
+import threading
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union, Tuple
+from typing import Dict, Any, Iterator, List, Optional, Union, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+if orjson is not None:
+    def _dumps(obj: Any, indent: bool = False) -> bytes:
+        """Serialize an object to UTF-8 encoded JSON."""
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    
+    def _dumps_line(obj: Any) -> bytes:
+        """Serialize an object to a newline-terminated JSON log line."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    
+    _loads = orjson.loads
+else:
+    # Shared encoder instances; compact separators keep log lines short
+    _json_encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+    _json_encode_indented = json.JSONEncoder(indent=2, ensure_ascii=False).encode
+    
+    def _dumps(obj: Any, indent: bool = False) -> bytes:
+        """Serialize an object to UTF-8 encoded JSON."""
+        if indent:
+            return _json_encode_indented(obj).encode("utf-8")
+        return _json_encode(obj).encode("utf-8")
+    
+    def _dumps_line(obj: Any) -> bytes:
+        """Serialize an object to a newline-terminated JSON log line."""
+        return (_json_encode(obj) + "\n").encode("utf-8")
+    
+    _loads = json.loads
+
+# Maximum number of queued events the writer thread serializes per write
+_WRITE_BATCH_SIZE = 256
+
+# Session logs older than this (the longest stats window) are archived
+_ARCHIVE_AFTER_DAYS = 30
+
+# Seconds the writer thread waits for more events before writing a batch
+_WRITE_LINGER = 0.005
+
+# Sentinel telling the writer thread to exit
+_STOP = object()
+
+_INSERT_INDEX_ROW = "INSERT INTO events (ts, type, fn, success, exec_time) VALUES (?, ?, ?, ?, ?)"
+
+# Patterns pulling the indexed fields out of an event log line without a
+# full JSON parse. success and execution_time are only matched as the
+# trailing keys of "data", so values nested in "arguments" are ignored.
+# Archived events carry a leading session_id, which the head skips.
+_LINE_HEAD_RE = re.compile(rb'\{(?:"session_id":\s*"[^"]*",\s*)?"event_type":\s*"([a-z_]+)",\s*"ts":\s*([0-9.eE+-]+)')
+_LINE_FUNCTION_RE = re.compile(rb'"data":\s*\{"function_name":\s*"([^"\\]*)"')
+_LINE_TAIL_RE = re.compile(
+    rb'(?:,\s*"execution_time":\s*([0-9.eE+-]+))?(?:,\s*"success":\s*(true|false))?\}\}\s*$'
+)
+
+# The same for the compact records written by log_function_call
+_LINE_CALL_RE = re.compile(rb'\{"t":"FC","ts":([0-9.eE+-]+),"fn":"([^"\\]*)"')
+_LINE_CALL_TAIL_RE = re.compile(rb'(?:,"et":([0-9.eE+-]+))?(?:,"ok":([01]))?\}\s*$')
+
 class EventType(Enum):
     """Types of events that can be logged for analytics."""
     
@@ -42,6 +113,9 @@ class EventType(Enum):
     SIMULATION_COMPLETED = "simulation_completed"
     SIMULATION_FAILED = "simulation_failed"
 
+# Enum member access is comparatively slow in per-event loops
+_FUNCTION_CALLED_VALUE = EventType.FUNCTION_CALLED.value
+
 class AnalyticsManager:
     """
     Manager for collecting and analyzing application usage statistics.
@@ -50,6 +124,9 @@ class AnalyticsManager:
     visualizations for user behavior and application performance.
     """
     
+    # Storage directories already created by this process
+    _created_dirs = set()
+    
     def __init__(self, storage_dir: Union[str, Path] = None, enabled: bool = True):
         """
         Initialize the analytics manager.
@@ -66,10 +143,14 @@ class AnalyticsManager:
         else:
             self._storage_dir = Path(storage_dir)
         
-        # Create directory if it doesn't exist
-        os.makedirs(self._storage_dir, exist_ok=True)
+        # Create directory if it doesn't exist; skipped for directories
+        # this process has already created
+        if self._storage_dir not in AnalyticsManager._created_dirs:
+            os.makedirs(self._storage_dir, exist_ok=True)
+            AnalyticsManager._created_dirs.add(self._storage_dir)
         
         self._enabled = enabled
+        self._bind_logging()
         self._session_id = datetime.now().strftime("%Y%m%d%H%M%S")
         self._session_start_time = time.time()
         self._event_count = 0
@@ -77,7 +158,27 @@ class AnalyticsManager:
         # Create event log file for this session
         self._event_log_path = self._storage_dir / f"events_{self._session_id}.jsonl"
         
-        logger.debug(f"AnalyticsManager initialized with storage directory: {self._storage_dir}")
+        # (directory mtime, event log paths) from the last directory scan
+        self._event_files_cache: Optional[Tuple[int, List[str]]] = None
+        
+        # The SQLite index used to answer stats queries, opened by
+        # _get_index once stats are needed
+        self._index: Optional[sqlite3.Connection] = None
+        self._index_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        
+        # Events are queued by log_event and written by a background thread
+        # that keeps the session's log open for its whole lifetime. The raw
+        # descriptor lets each batch go out as a single writev. The write
+        # lock is held while a batch is written and indexed. The log and the
+        # thread are only set up by _start_writer once an event is logged,
+        # so a disabled manager creates no files
+        self._fd = -1
+        self._write_lock = threading.Lock()
+        self._queue = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        
+        logger.debug("AnalyticsManager initialized with storage directory: %s", self._storage_dir)
         
         # Log session start event
         if self._enabled:
@@ -105,7 +206,61 @@ class AnalyticsManager:
             value: True to enable, False to disable.
         """
         self._enabled = value
-        logger.debug(f"Analytics collection {'enabled' if value else 'disabled'}")
+        self._bind_logging()
+        logger.debug("Analytics collection %s", "enabled" if value else "disabled")
+    
+    def _bind_logging(self):
+        """
+        Point the logging methods at no-ops while collection is disabled.
+        
+        Shadowing the methods on the instance keeps the enabled check out of
+        every logging call; deleting the shadows restores the real methods.
+        """
+        for name in ("log_event", "log_error", "log_function_call"):
+            if self._enabled:
+                self.__dict__.pop(name, None)
+            else:
+                setattr(self, name, self._log_disabled)
+    
+    @staticmethod
+    def _log_disabled(*args, **kwargs) -> bool:
+        """Stand-in for the logging methods while collection is disabled."""
+        return False
+    
+    def _get_index(self) -> sqlite3.Connection:
+        """
+        Get the stats index, opening it on first use.
+        
+        Old session logs are folded into their daily archives first, so the
+        index is built from the compacted files.
+        
+        Returns:
+            The connection to the stats index.
+        """
+        with self._start_lock:
+            if self._index is None:
+                # Fold old session logs into compressed daily archives
+                self._archive_old_logs()
+                self._open_index()
+            return self._index
+    
+    def _start_writer(self):
+        """Open the session's log and start the writer thread, if not done yet."""
+        index = self._get_index()
+        
+        with self._start_lock:
+            if self._writer is not None:
+                return
+            
+            self._fd = self._open_event_log()
+            self._writer = threading.Thread(
+                target=self._writer_loop,
+                args=(index,),
+                name="analytics-writer",
+                daemon=True
+            )
+            self._writer.start()
+            atexit.register(self.close)
     
     def log_event(self, event_type: EventType, data: Dict[str, Any] = None) -> bool:
         """
@@ -118,33 +273,495 @@ class AnalyticsManager:
         Returns:
             True if the event was logged successfully, False otherwise.
         """
+        # Normally shadowed while disabled; guards calls made through the class
         if not self._enabled:
             return False
         
+        event_type_value = event_type.value
+        
         try:
-            timestamp = datetime.now().isoformat()
-            
+            # Epoch seconds; converted to ISO 8601 only when exporting. The
+            # session ID is implied by the log's file name
             event = {
-                "event_type": event_type.value,
-                "timestamp": timestamp,
-                "session_id": self._session_id
+                "event_type": event_type_value,
+                "ts": time.time()
             }
             
             if data:
                 event["data"] = data
             
-            # Append to event log file
-            with open(self._event_log_path, "a") as f:
-                f.write(json.dumps(event) + "\n")
+            # Encode here so an unserializable payload is reported to the
+            # caller rather than reaching the writer thread
+            line = _dumps_line(event)
+            row = self._index_row(event)
+            
+            # Hand the encoded event and its index row to the writer thread
+            if self._writer is None:
+                self._start_writer()
+            self._queue.put_nowait((line, row))
+            if event_type is EventType.APP_EXIT:
+                self.flush()
             
             self._event_count += 1
-            logger.debug(f"Logged event: {event_type.value}")
+            logger.debug("Logged event: %s", event_type_value)
             return True
             
         except Exception as e:
-            logger.error(f"Error logging event {event_type.value}: {e}")
+            logger.error(f"Error logging event {event_type_value}: {e}")
             return False
     
+    def _writer_loop(self, index: sqlite3.Connection):
+        """
+        Drain the event queue and append events to the session's log.
+        
+        Args:
+            index: The stats index the events are added to.
+        """
+        running = True
+        
+        while running:
+            items = [self._queue.get()]
+            
+            # Linger briefly for more events so bursts share one write, but
+            # stop as soon as a flush or shutdown is waiting on the batch
+            urgent = not isinstance(items[0], tuple)
+            deadline = time.monotonic() + _WRITE_LINGER
+            while len(items) < _WRITE_BATCH_SIZE:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    remaining = deadline - time.monotonic()
+                    if urgent or remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                
+                items.append(item)
+                if not isinstance(item, tuple):
+                    urgent = True
+            
+            lines = []
+            rows = []
+            waiters = []
+            for item in items:
+                if item is _STOP:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    # Event already encoded by log_event or log_function_call
+                    lines.append(item[0])
+                    rows.append(item[1])
+            
+            with self._write_lock:
+                try:
+                    if lines:
+                        self._write_lines(lines)
+                except Exception as e:
+                    logger.error(f"Error writing analytics events: {e}")
+                
+                try:
+                    if rows:
+                        with self._index_lock, index:
+                            index.executemany(_INSERT_INDEX_ROW, rows)
+                except Exception as e:
+                    logger.error(f"Error indexing analytics events: {e}")
+            
+            for waiter in waiters:
+                waiter.set()
+        
+        with self._write_lock:
+            os.close(self._fd)
+            self._fd = -1
+    
+    def _open_event_log(self) -> int:
+        """
+        Open the session's log for appending, creating it if needed.
+        
+        Returns:
+            The file descriptor of the log.
+        """
+        return os.open(self._event_log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    
+    def _write_lines(self, lines: List[bytes]):
+        """
+        Append encoded lines to the session's log.
+        
+        The lines are handed to the kernel as one scatter-gather write
+        rather than being joined into a single buffer first.
+        
+        Args:
+            lines: Newline-terminated event records.
+        """
+        while lines:
+            written = os.writev(self._fd, lines)
+            
+            # Drop whatever a short write already covered and retry the rest
+            for i, line in enumerate(lines):
+                if written < len(line):
+                    lines = [line[written:]] + lines[i + 1:] if written else lines[i:]
+                    break
+                written -= len(line)
+            else:
+                lines = []
+    
+    def _open_index(self):
+        """Open the stats index, rebuilding it from the event logs if it is new."""
+        self._index = sqlite3.connect(
+            self._storage_dir / "analytics.db",
+            check_same_thread=False
+        )
+        
+        with self._index_lock, self._index:
+            exists = self._index.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events'"
+            ).fetchone()
+            
+            self._index.execute('''
+            CREATE TABLE IF NOT EXISTS events (
+                ts REAL NOT NULL,
+                type TEXT NOT NULL,
+                fn TEXT,
+                success INTEGER,
+                exec_time REAL
+            )
+            ''')
+            
+            # Covering index: stats range scans read contiguous index pages
+            # holding every aggregated column and never touch the table
+            self._index.execute(
+                "CREATE INDEX IF NOT EXISTS idx_events_covering "
+                "ON events (ts, type, fn, success, exec_time)"
+            )
+        
+        if not exists:
+            self._rebuild_index()
+    
+    def _rebuild_index(self):
+        """Populate the stats index from the events already on disk."""
+        rows = [
+            row
+            for file_path in self._list_event_files()
+            for row in self._scan_index_rows(file_path)
+        ]
+        
+        with self._index_lock, self._index:
+            self._index.executemany(_INSERT_INDEX_ROW, rows)
+        
+        logger.debug("Rebuilt analytics index with %s events", len(rows))
+    
+    def _scan_events(self) -> Iterator[Dict[str, Any]]:
+        """
+        Parse every event in the event logs.
+        
+        Yields:
+            Each event as written to the event log, in file order.
+        """
+        for file_path in self._list_event_files():
+            yield from self._read_event_file(file_path)
+    
+    def _list_event_files(self) -> List[str]:
+        """
+        List the event logs in the storage directory.
+        
+        The listing is cached and only refreshed when the directory's
+        modification time changes.
+        
+        Returns:
+            Paths of all event log files.
+        """
+        mtime = os.stat(self._storage_dir).st_mtime_ns
+        if self._event_files_cache is not None and self._event_files_cache[0] == mtime:
+            return self._event_files_cache[1]
+        
+        with os.scandir(self._storage_dir) as entries:
+            event_files = [
+                entry.path for entry in entries
+                if (entry.name.startswith("events_") and entry.name.endswith(".jsonl"))
+                or (entry.name.startswith("daily_") and entry.name.endswith(".jsonl.gz"))
+            ]
+        
+        self._event_files_cache = (mtime, event_files)
+        return event_files
+    
+    def _archive_old_logs(self):
+        """
+        Compact session logs older than the longest stats window.
+        
+        Each day's old events_*.jsonl files are merged in timestamp order
+        with the gzip archive for that day (daily_YYYYMMDD.jsonl.gz), which
+        is rewritten, and then removed. Sessions of a day can overlap, so
+        the merge keeps archives sorted for export_data. The session date is
+        taken from the file name, so recent logs are never opened. Archived
+        events get an explicit session_id since the file name no longer
+        carries it.
+        """
+        cutoff = datetime.fromtimestamp(
+            time.time() - _ARCHIVE_AFTER_DAYS * 86400
+        ).strftime("%Y%m%d")
+        
+        try:
+            # Old session logs by day
+            old_logs: Dict[str, List[str]] = {}
+            for file_path in self._list_event_files():
+                name = os.path.basename(file_path)
+                day = name[len("events_"):len("events_") + 8]
+                if name.startswith("events_") and day < cutoff:
+                    old_logs.setdefault(day, []).append(file_path)
+            
+            for day, file_paths in old_logs.items():
+                archive_path = self._storage_dir / f"daily_{day}.jsonl.gz"
+                sources = list(file_paths)
+                if archive_path.exists():
+                    sources.append(str(archive_path))
+                
+                events = heapq.merge(
+                    *(self._read_event_file(file_path) for file_path in sources),
+                    key=self._event_ts
+                )
+                
+                tmp_path = archive_path.with_name(archive_path.name + ".tmp")
+                with gzip.open(tmp_path, "wb") as dst:
+                    for event in events:
+                        dst.write(_dumps({"session_id": event.pop("session_id"), **event}) + b"\n")
+                os.replace(tmp_path, archive_path)
+                
+                for file_path in file_paths:
+                    os.unlink(file_path)
+                
+                logger.debug("Archived %s session logs into %s", len(file_paths), archive_path.name)
+        
+        except Exception as e:
+            logger.error(f"Error archiving old event logs: {e}")
+    
+    @staticmethod
+    def _open_event_file(file_path: str):
+        """
+        Open an event log for binary reading.
+        
+        Args:
+            file_path: Path of a session log or a gzip-compressed daily archive.
+            
+        Returns:
+            A binary file object iterating over the log's lines.
+        """
+        if file_path.endswith(".gz"):
+            return gzip.open(file_path, "rb")
+        return open(file_path, "rb")
+    
+    @staticmethod
+    def _session_of(file_path: str) -> Optional[str]:
+        """
+        Get the session ID encoded in a session log's file name.
+        
+        Args:
+            file_path: Path of an event log.
+            
+        Returns:
+            The session ID, or None for daily archives.
+        """
+        name = os.path.basename(file_path)
+        if name.startswith("events_") and name.endswith(".jsonl"):
+            return name[len("events_"):-len(".jsonl")]
+        return None
+    
+    @staticmethod
+    def _read_event_file(file_path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Parse the events in a single event log, one line at a time.
+        
+        Args:
+            file_path: Path of the event log to read.
+            
+        Yields:
+            Each event in file order, with its session_id filled in from
+            the file name when the record does not carry one.
+        """
+        session_id = AnalyticsManager._session_of(file_path)
+        
+        with AnalyticsManager._open_event_file(file_path) as f:
+            for line in f:
+                try:
+                    event = AnalyticsManager._expand_event(_loads(line))
+                    if "session_id" not in event:
+                        event["session_id"] = session_id
+                    yield event
+                except Exception as e:
+                    logger.warning(f"Error parsing event from {file_path}: {e}")
+    
+    @staticmethod
+    def _expand_event(event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert a compact function call record into the generic event form.
+        
+        Args:
+            event: An event as parsed from the event log.
+            
+        Returns:
+            The event with "event_type" and "data" keys; events that are
+            already in that form are returned unchanged.
+        """
+        if event.get("t") != "FC":
+            return event
+        
+        data = {
+            "function_name": event["fn"],
+            "arguments": event["args"]
+        }
+        
+        if "et" in event:
+            data["execution_time"] = event["et"]
+        
+        if "ok" in event:
+            data["success"] = bool(event["ok"])
+        
+        expanded = {"event_type": _FUNCTION_CALLED_VALUE, "ts": event["ts"], "data": data}
+        if "session_id" in event:
+            expanded["session_id"] = event["session_id"]
+        return expanded
+    
+    @staticmethod
+    def _scan_index_rows(file_path: str) -> Iterator[Tuple]:
+        """
+        Extract the stats index rows from a single event log.
+        
+        Lines are matched against precompiled patterns; only lines the
+        patterns cannot handle (e.g. older event formats) are fully parsed.
+        
+        Args:
+            file_path: Path of the event log to read.
+            
+        Yields:
+            A (ts, type, fn, success, exec_time) tuple for each event.
+        """
+        function_called = _FUNCTION_CALLED_VALUE.encode()
+        
+        with AnalyticsManager._open_event_file(file_path) as f:
+            for line in f:
+                call = _LINE_CALL_RE.match(line)
+                if call is not None:
+                    tail = _LINE_CALL_TAIL_RE.search(line, call.end())
+                    if tail is not None:
+                        ts, function_name = call.groups()
+                        exec_time, success = tail.groups()
+                        yield (
+                            float(ts),
+                            _FUNCTION_CALLED_VALUE,
+                            function_name.decode(),
+                            None if success is None else int(success),
+                            None if exec_time is None else float(exec_time)
+                        )
+                        continue
+                
+                head = _LINE_HEAD_RE.match(line)
+                if head is not None:
+                    event_type, ts = head.groups()
+                    if event_type != function_called:
+                        yield (float(ts), event_type.decode(), None, None, None)
+                        continue
+                    
+                    function = _LINE_FUNCTION_RE.search(line, head.end())
+                    tail = _LINE_TAIL_RE.search(line, head.end())
+                    if function is not None and tail is not None:
+                        exec_time, success = tail.groups()
+                    
+                    # A key the tail did not match may still be present
+                    # elsewhere in the line (e.g. written in another order);
+                    # only a full parse can tell where it belongs
+                    if function is not None and tail is not None and not (
+                        (exec_time is None and b'"execution_time"' in line)
+                        or (success is None and b'"success"' in line)
+                    ):
+                        yield (
+                            float(ts),
+                            _FUNCTION_CALLED_VALUE,
+                            function.group(1).decode(),
+                            None if success is None else int(success == b"true"),
+                            None if exec_time is None else float(exec_time)
+                        )
+                        continue
+                
+                # Fall back to a full parse
+                try:
+                    yield AnalyticsManager._index_row(AnalyticsManager._expand_event(_loads(line)))
+                except Exception as e:
+                    logger.warning(f"Error parsing event from {file_path}: {e}")
+    
+    @staticmethod
+    def _event_ts(event: Dict[str, Any]) -> float:
+        """
+        Get the time of an event in epoch seconds.
+        
+        Args:
+            event: The event as written to the event log.
+            
+        Returns:
+            The event's timestamp.
+        """
+        ts = event.get("ts")
+        if ts is None:
+            # Events written before epoch timestamps were introduced
+            ts = datetime.fromisoformat(event["timestamp"]).timestamp()
+        return ts
+    
+    @staticmethod
+    def _index_row(event: Dict[str, Any]) -> Tuple:
+        """
+        Convert an event into a row of the stats index.
+        
+        Args:
+            event: The event as written to the event log.
+            
+        Returns:
+            A (ts, type, fn, success, exec_time) tuple.
+        """
+        ts = AnalyticsManager._event_ts(event)
+        event_type = event["event_type"]
+        
+        if event_type != _FUNCTION_CALLED_VALUE:
+            return (ts, event_type, None, None, None)
+        
+        data = event.get("data", {})
+        success = data.get("success")
+        return (
+            ts,
+            event_type,
+            data.get("function_name"),
+            None if success is None else int(bool(success)),
+            data.get("execution_time")
+        )
+    
+    def flush(self, timeout: float = 5.0):
+        """
+        Wait until all queued events have been written to the event log.
+        
+        Args:
+            timeout: Maximum time in seconds to wait for the writer thread.
+        """
+        if self._writer is None or not self._writer.is_alive():
+            return
+        
+        done = threading.Event()
+        self._queue.put_nowait(done)
+        done.wait(timeout)
+    
+    def close(self):
+        """Write any queued events, stop the writer thread and close the index."""
+        with self._start_lock:
+            writer, self._writer = self._writer, None
+            index, self._index = self._index, None
+        
+        if writer is not None and writer.is_alive():
+            self._queue.put_nowait(_STOP)
+            writer.join()
+        if index is not None:
+            index.close()
+        
+        # Let closed managers be garbage collected
+        atexit.unregister(self.close)
+    
     def log_error(self, error_message: str, error_type: str = None, stack_trace: str = None) -> bool:
         """
         Log an error event for analytics.
@@ -183,18 +800,46 @@ class AnalyticsManager:
         Returns:
             True if the event was logged successfully, False otherwise.
         """
-        data = {
-            "function_name": function_name,
-            "arguments": arguments
-        }
-        
-        if execution_time is not None:
-            data["execution_time"] = execution_time
+        # Highest-volume event: encode the compact record directly rather
+        # than building the generic event dict
+        ts = time.time()
         
-        if success is not None:
-            data["success"] = success
-        
-        return self.log_event(EventType.FUNCTION_CALLED, data)
+        try:
+            # NaN and infinity have no JSON form; such times are left out
+            if execution_time is not None:
+                execution_time = float(execution_time)
+                if not math.isfinite(execution_time):
+                    execution_time = None
+            
+            line = b'{"t":"FC","ts":%a,"fn":%b,"args":%b' % (
+                ts, _dumps(function_name), _dumps(arguments)
+            )
+            if execution_time is not None:
+                line += b',"et":%a' % execution_time
+            if success is not None:
+                line += b',"ok":%d' % bool(success)
+            line += b"}\n"
+            
+            row = (
+                ts,
+                _FUNCTION_CALLED_VALUE,
+                function_name,
+                None if success is None else int(bool(success)),
+                execution_time
+            )
+            
+            # Hand the encoded record and its index row to the writer thread
+            if self._writer is None:
+                self._start_writer()
+            self._queue.put_nowait((line, row))
+            
+            self._event_count += 1
+            logger.debug("Logged event: %s", _FUNCTION_CALLED_VALUE)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error logging event {_FUNCTION_CALLED_VALUE}: {e}")
+            return False
     
     def get_session_stats(self) -> Dict[str, Any]:
         """
@@ -212,51 +857,101 @@ class AnalyticsManager:
             "event_count": self._event_count
         }
     
-    def get_event_counts(self, days: int = 7) -> Dict[str, int]:
+    def get_all_stats(self, days: int = 7) -> Dict[str, Dict[str, Any]]:
         """
-        Get counts of events by type for the specified number of days.
+        Get event counts, function stats and daily usage in a single pass.
         
         Args:
             days: Number of days to include in the analysis.
             
         Returns:
-            A dictionary of event types and their counts.
+            A dictionary with "event_counts", "function_stats" and
+            "daily_usage" entries, shaped like the results of
+            get_event_counts, get_function_stats and get_daily_usage.
         """
+        stats = {
+            "event_counts": {},
+            "function_stats": {},
+            "daily_usage": {}
+        }
+        
         if not self._enabled:
-            return {}
+            return stats
         
         try:
-            # Calculate start date
-            start_date = datetime.now() - timedelta(days=days)
-            
-            # Find all event log files
-            event_files = list(self._storage_dir.glob("events_*.jsonl"))
-            
-            # Process each file
-            event_counts = {}
-            
-            for file_path in event_files:
-                with open(file_path, "r") as f:
-                    for line in f:
-                        try:
-                            event = json.loads(line)
-                            event_timestamp = datetime.fromisoformat(event["timestamp"])
-                            
-                            # Skip events before start date
-                            if event_timestamp < start_date:
-                                continue
-                            
-                            event_type = event["event_type"]
-                            event_counts[event_type] = event_counts.get(event_type, 0) + 1
-                        
-                        except Exception as e:
-                            logger.warning(f"Error parsing event from {file_path}: {e}")
-            
-            return event_counts
+            self.flush()
+            
+            # Calculate start timestamp
+            start_ts = time.time() - days * 86400
+            
+            index = self._get_index()
+            with self._index_lock:
+                rows = index.execute(
+                    """
+                    SELECT type, fn, date(ts, 'unixepoch', 'localtime') AS day,
+                           COUNT(*), SUM(success = 1), SUM(success = 0),
+                           COALESCE(SUM(exec_time), 0)
+                    FROM events
+                    WHERE ts >= ?
+                    GROUP BY type, fn, day
+                    """,
+                    (start_ts,)
+                ).fetchall()
+            
+            event_counts = stats["event_counts"]
+            daily_usage = stats["daily_usage"]
+            
+            # Per-function [call_count, success_count, error_count, total_time]
+            totals = {}
+            
+            for event_type, function_name, day, count, success_count, error_count, total_time in rows:
+                event_counts[event_type] = event_counts.get(event_type, 0) + count
+                daily_usage[day] = daily_usage.get(day, 0) + count
+                
+                if function_name is None:
+                    continue
+                
+                acc = totals.get(function_name)
+                if acc is None:
+                    acc = totals[function_name] = [0, 0, 0, 0]
+                
+                acc[0] += count
+                acc[1] += success_count or 0
+                acc[2] += error_count or 0
+                acc[3] += total_time
+            
+            stats["function_stats"] = {
+                function_name: {
+                    "call_count": call_count,
+                    "success_count": success_count,
+                    "error_count": error_count,
+                    "total_execution_time": total_time,
+                    "avg_execution_time": total_time / call_count
+                }
+                for function_name, (call_count, success_count, error_count, total_time) in totals.items()
+            }
+            
+            return stats
             
         except Exception as e:
-            logger.error(f"Error getting event counts: {e}")
-            return {}
+            logger.error(f"Error getting analytics stats: {e}")
+            return {
+                "event_counts": {},
+                "function_stats": {},
+                "daily_usage": {}
+            }
+    
+    def get_event_counts(self, days: int = 7) -> Dict[str, int]:
+        """
+        Get counts of events by type for the specified number of days.
+        
+        Args:
+            days: Number of days to include in the analysis.
+            
+        Returns:
+            A dictionary of event types and their counts.
+        """
+        return self.get_all_stats(days)["event_counts"]
     
     def get_function_stats(self, days: int = 7) -> Dict[str, Dict[str, Any]]:
         """
@@ -268,71 +963,7 @@ class AnalyticsManager:
         Returns:
             A dictionary of function names and their usage statistics.
         """
-        if not self._enabled:
-            return {}
-        
-        try:
-            # Calculate start date
-            start_date = datetime.now() - timedelta(days=days)
-            
-            # Find all event log files
-            event_files = list(self._storage_dir.glob("events_*.jsonl"))
-            
-            # Process each file
-            function_stats = {}
-            
-            for file_path in event_files:
-                with open(file_path, "r") as f:
-                    for line in f:
-                        try:
-                            event = json.loads(line)
-                            
-                            # Only process function call events
-                            if event["event_type"] != EventType.FUNCTION_CALLED.value:
-                                continue
-                            
-                            event_timestamp = datetime.fromisoformat(event["timestamp"])
-                            
-                            # Skip events before start date
-                            if event_timestamp < start_date:
-                                continue
-                            
-                            data = event.get("data", {})
-                            function_name = data.get("function_name")
-                            
-                            if function_name:
-                                # Initialize stats for this function if not seen before
-                                if function_name not in function_stats:
-                                    function_stats[function_name] = {
-                                        "call_count": 0,
-                                        "success_count": 0,
-                                        "error_count": 0,
-                                        "total_execution_time": 0,
-                                        "avg_execution_time": 0
-                                    }
-                                
-                                # Update stats
-                                stats = function_stats[function_name]
-                                stats["call_count"] += 1
-                                
-                                if "success" in data:
-                                    if data["success"]:
-                                        stats["success_count"] += 1
-                                    else:
-                                        stats["error_count"] += 1
-                                
-                                if "execution_time" in data:
-                                    stats["total_execution_time"] += data["execution_time"]
-                                    stats["avg_execution_time"] = stats["total_execution_time"] / stats["call_count"]
-                        
-                        except Exception as e:
-                            logger.warning(f"Error parsing event from {file_path}: {e}")
-            
-            return function_stats
-            
-        except Exception as e:
-            logger.error(f"Error getting function stats: {e}")
-            return {}
+        return self.get_all_stats(days)["function_stats"]
     
     def get_daily_usage(self, days: int = 30) -> Dict[str, int]:
         """
@@ -344,42 +975,7 @@ class AnalyticsManager:
         Returns:
             A dictionary of dates and their usage counts.
         """
-        if not self._enabled:
-            return {}
-        
-        try:
-            # Calculate start date
-            start_date = datetime.now() - timedelta(days=days)
-            
-            # Find all event log files
-            event_files = list(self._storage_dir.glob("events_*.jsonl"))
-            
-            # Process each file
-            daily_counts = {}
-            
-            for file_path in event_files:
-                with open(file_path, "r") as f:
-                    for line in f:
-                        try:
-                            event = json.loads(line)
-                            event_timestamp = datetime.fromisoformat(event["timestamp"])
-                            
-                            # Skip events before start date
-                            if event_timestamp < start_date:
-                                continue
-                            
-                            # Get date string
-                            date_str = event_timestamp.date().isoformat()
-                            daily_counts[date_str] = daily_counts.get(date_str, 0) + 1
-                        
-                        except Exception as e:
-                            logger.warning(f"Error parsing event from {file_path}: {e}")
-            
-            return daily_counts
-            
-        except Exception as e:
-            logger.error(f"Error getting daily usage: {e}")
-            return {}
+        return self.get_all_stats(days)["daily_usage"]
     
     def clear_all_data(self) -> bool:
         """
@@ -389,12 +985,26 @@ class AnalyticsManager:
             True if data was cleared successfully, False otherwise.
         """
         try:
-            # Find all event log files
-            event_files = list(self._storage_dir.glob("events_*.jsonl"))
+            self.flush()
             
-            # Delete each file
-            for file_path in event_files:
-                file_path.unlink()
+            # Hold off the writer so no batch lands in a deleted log or
+            # in the index while it is being cleared
+            with self._write_lock:
+                # Find all event log files
+                event_files = self._list_event_files()
+                
+                # Delete each file
+                for file_path in event_files:
+                    os.unlink(file_path)
+                
+                # Start a new log for the rest of the session
+                if self._fd >= 0:
+                    os.close(self._fd)
+                    self._fd = self._open_event_log()
+                
+                index = self._get_index()
+                with self._index_lock, index:
+                    index.execute("DELETE FROM events")
             
             logger.info(f"Cleared all analytics data ({len(event_files)} files)")
             return True
@@ -414,31 +1024,31 @@ class AnalyticsManager:
             True if data was exported successfully, False otherwise.
         """
         try:
+            self.flush()
             output_path = Path(output_path)
             
-            # Find all event log files
-            event_files = list(self._storage_dir.glob("events_*.jsonl"))
-            
-            # Combine data from all files
-            all_events = []
-            
-            for file_path in event_files:
-                with open(file_path, "r") as f:
-                    for line in f:
-                        try:
-                            event = json.loads(line)
-                            all_events.append(event)
-                        except Exception as e:
-                            logger.warning(f"Error parsing event from {file_path}: {e}")
-            
-            # Sort events by timestamp
-            all_events.sort(key=lambda e: e["timestamp"])
+            # Each log is already in append order, so a k-way merge yields
+            # all events in timestamp order without loading them into memory
+            event_files = sorted(self._list_event_files())
+            events = heapq.merge(
+                *(self._read_event_file(file_path) for file_path in event_files),
+                key=self._event_ts
+            )
             
-            # Write combined data
-            with open(output_path, "w") as f:
-                json.dump(all_events, f, indent=2)
+            # Stream the events out as an indented JSON array
+            event_count = 0
+            with open(output_path, "wb") as f:
+                f.write(b"[")
+                for event in events:
+                    if "ts" in event:
+                        event["timestamp"] = datetime.fromtimestamp(event.pop("ts")).isoformat()
+                    
+                    f.write(b",\n  " if event_count else b"\n  ")
+                    f.write(_dumps(event, indent=True).replace(b"\n", b"\n  "))
+                    event_count += 1
+                f.write(b"\n]" if event_count else b"]")
             
-            logger.info(f"Exported {len(all_events)} events to {output_path}")
+            logger.info(f"Exported {event_count} events to {output_path}")
             return True
             
         except Exception as e:
@@ -33,6 +33,7 @@ class GeminiClient:
         self._model = None
         self._is_authenticated = False
         self._tools = []
+        self._tools_by_name: Dict[str, Dict[str, Any]] = {}
         self._function_handlers: Dict[str, Callable] = {}
         
         logger.debug("GeminiClient initialized")
@@ -85,8 +86,40 @@ class GeminiClient:
         Args:
             tools: List of tool definitions in the Gemini API format.
         """
-        self._tools = tools
-        logger.debug(f"Registered {len(tools)} tools with the API client")
+        # Index tools by function name for dispatching calls; later
+        # registrations of a name win. The list sent to the API is kept as given
+        tools_by_name: Dict[str, Dict[str, Any]] = {}
+        for tool in tools:
+            name = self._tool_name(tool)
+            if not name:
+                logger.warning(f"Tool without a function name cannot be called: {tool.get('id', tool)}")
+                continue
+            if name in tools_by_name:
+                logger.warning(f"Duplicate tool name {name}: {tool.get('id', 'unnamed')} replaces {tools_by_name[name].get('id', 'unnamed')}")
+            tools_by_name[name] = tool
+        
+        self._tools_by_name = tools_by_name
+        self._tools = list(tools)
+        logger.debug("Registered %s tools with the API client", len(self._tools))
+    
+    @staticmethod
+    def _tool_name(tool: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the function name declared by a tool definition.
+        
+        Args:
+            tool: A tool definition, either as stored by the tool manager or
+                  in the Gemini API "function_declarations" format.
+            
+        Returns:
+            The declared function name, or None if the tool has none.
+        """
+        if "function" in tool:
+            return tool["function"].get("name")
+        declarations = tool.get("function_declarations")
+        if declarations:
+            return declarations[0].get("name")
+        return tool.get("name")
     
     def register_function_handler(self, function_name: str, handler: Callable):
         """
@@ -97,7 +130,7 @@ class GeminiClient:
             handler: The function that will handle the call.
         """
         self._function_handlers[function_name] = handler
-        logger.debug(f"Registered handler for function: {function_name}")
+        logger.debug("Registered handler for function: %s", function_name)
     
     async def send_message(self, message: str, conversation_history: List[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -144,32 +177,35 @@ class GeminiClient:
         function_name = function_call.get("name")
         arguments = function_call.get("arguments", {})
         
-        logger.debug(f"Handling function call: {function_name}")
-        
-        if function_name in self._function_handlers:
-            try:
-                handler = self._function_handlers[function_name]
-                result = await handler(arguments)
-                
-                response = {
-                    "name": function_name,
-                    "response": result,
-                }
-                
-                return response
-                
-            except Exception as e:
-                logger.error(f"Error executing function {function_name}: {e}")
-                return {
-                    "name": function_name,
-                    "error": str(e),
-                }
-        else:
+        logger.debug("Handling function call: %s", function_name)
+        
+        if function_name not in self._tools_by_name:
+            logger.warning(f"Function call for unregistered tool: {function_name}")
+        
+        handler = self._function_handlers.get(function_name)
+        if handler is None:
             logger.warning(f"No handler registered for function: {function_name}")
             return {
                 "name": function_name,
                 "error": f"No handler registered for function: {function_name}",
             }
+        
+        try:
+            result = await handler(arguments)
+            
+            response = {
+                "name": function_name,
+                "response": result,
+            }
+            
+            return response
+            
+        except Exception as e:
+            logger.error(f"Error executing function {function_name}: {e}")
+            return {
+                "name": function_name,
+                "error": str(e),
+            }
     
     async def send_function_response(self, function_response: Dict[str, Any], conversation_history: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
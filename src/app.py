@@ -4,22 +4,56 @@ Main application entry point module.
 This module initializes and coordinates all components of the application.
 """
 
+import importlib
 import logging
+import sqlite3
 import sys
 import os
+from functools import cached_property
 from pathlib import Path
 from typing import Optional, Dict, Any
 
+from ._lazy import lazy_module
 from .core.app_state import AppState
-from .api_client.gemini_client import GeminiClient
-from .tool_manager.tool_manager import ToolManager
-from .persistence.database import Database
-from .simulation_environment.sandbox import FunctionSandbox
-from .local_executor.executor import LocalExecutor, ExecutionPermission
-from .analytics_logging.analytics import AnalyticsManager, EventType
 
 logger = logging.getLogger(__name__)
 
+# Component classes are imported on first use rather than with this module,
+# so importing src.app does not pull in every subsystem
+_LAZY_ATTRS = {
+    "GeminiClient": ".api_client.gemini_client",
+    "ToolManager": ".tool_manager.tool_manager",
+    "Database": ".persistence.database",
+    "FunctionSandbox": ".simulation_environment.sandbox",
+    "LocalExecutor": ".local_executor.executor",
+    "ExecutionPermission": ".local_executor.executor",
+    "AnalyticsManager": ".analytics_logging.analytics",
+    "EventType": ".analytics_logging.analytics",
+}
+
+# Analytics and the sandbox are not needed until a message is sent or a
+# function is tested; their modules only execute on first attribute access
+_analytics = lazy_module(f"{__package__}.analytics_logging.analytics")
+_sandbox = lazy_module(f"{__package__}.simulation_environment.sandbox")
+
+def __getattr__(name: str) -> Any:
+    """
+    Resolve component classes lazily (PEP 562).
+    
+    Args:
+        name: The module attribute being looked up.
+        
+    Returns:
+        The requested class, imported from its submodule on first access.
+    """
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(module_name, __package__), name)
+    globals()[name] = value
+    return value
+
 class Application:
     """
     Main application class that initializes and coordinates all components.
@@ -38,52 +72,118 @@ class Application:
         """
         logger.info("Initializing application")
         
-        # Initialize components
+        from .tool_manager.tool_manager import ToolManager
+        from .persistence.database import Database
+        
+        # Initialize components; the API client, local executor, sandbox and
+        # analytics are created on first use from the loaded settings
         self.app_state = AppState()
         self.database = Database()
         self.tool_manager = ToolManager()
-        self.api_client = GeminiClient()
-        self.function_sandbox = FunctionSandbox()
-        self.local_executor = LocalExecutor(
-            default_permission=ExecutionPermission.NONE,
-            sandbox_enabled=True,
-            user_confirmation_callback=self._confirm_local_execution
-        )
-        self.analytics = AnalyticsManager()
+        
+        # Loaded state handed to the API client when it is created
+        self._enabled_tools = []
         
         # Load settings from database
         self._load_settings()
         
-        # Load API key if available
-        self._load_api_key()
-        
         # Load tools
         self._load_tools()
         
+        # Load API key if available
+        self._load_api_key()
+        
         logger.info("Application initialized successfully")
     
+    @cached_property
+    def api_client(self):
+        """
+        The Gemini API client, created on first use.
+        
+        Returns:
+            The application's GeminiClient, with the enabled tools registered.
+        """
+        from .api_client.gemini_client import GeminiClient
+        
+        api_client = GeminiClient()
+        api_client.register_tools(self._enabled_tools)
+        return api_client
+    
+    @cached_property
+    def local_executor(self):
+        """
+        The local executor, created on first use.
+        
+        Returns:
+            The application's LocalExecutor, configured from the settings.
+        """
+        from .local_executor.executor import LocalExecutor, ExecutionPermission
+        
+        settings = self.app_state.app_settings
+        return LocalExecutor(
+            default_permission=ExecutionPermission.from_string(
+                settings.get("default_execution_permission", ExecutionPermission.NONE.value)
+            ),
+            sandbox_enabled=settings.get("sandbox_enabled", True),
+            user_confirmation_callback=self._confirm_local_execution
+        )
+    
+    @cached_property
+    def analytics(self):
+        """
+        The analytics manager, created on first use.
+        
+        Returns:
+            The application's AnalyticsManager.
+        """
+        return _analytics.AnalyticsManager(
+            enabled=self.app_state.app_settings.get("analytics_enabled", True)
+        )
+    
+    @cached_property
+    def function_sandbox(self):
+        """
+        The function sandbox, created on first use.
+        
+        Returns:
+            The application's FunctionSandbox.
+        """
+        function_sandbox = _sandbox.FunctionSandbox()
+        if "function_timeout" in self.app_state.app_settings:
+            function_sandbox._timeout = self.app_state.app_settings["function_timeout"]
+        return function_sandbox
+    
     def _load_settings(self):
-        """Load application settings from the database."""
+        """
+        Load application settings from the database into the app state.
+        
+        Components read their settings from the app state when they are
+        created.
+        """
         logger.debug("Loading application settings")
         
         settings = self.database.get_all_settings()
         self.app_state.update_settings(settings)
         
-        # Apply settings to components
-        if "analytics_enabled" in settings:
-            self.analytics.enabled = settings["analytics_enabled"]
-        
-        if "default_execution_permission" in settings:
-            permission = ExecutionPermission.from_string(settings["default_execution_permission"])
-            self.local_executor._default_permission = permission
+        logger.debug(f"Loaded {len(settings)} application settings")
+    
+    def save_setting(self, key: str, value: Any) -> bool:
+        """
+        Save a setting to the database and the application state.
         
-        if "sandbox_enabled" in settings:
-            self.local_executor._sandbox_enabled = settings["sandbox_enabled"]
+        Args:
+            key: The setting key.
+            value: The setting value.
+            
+        Returns:
+            True if the setting was saved successfully, False otherwise.
+        """
+        saved = self.database.set_setting(key, value)
         
-        if "function_timeout" in settings:
-            self.function_sandbox._timeout = settings["function_timeout"]
+        if saved:
+            self.app_state.update_settings({key: value})
         
-        logger.debug(f"Loaded {len(settings)} application settings")
+        return saved
     
     def _load_api_key(self):
         """Load Gemini API key from secure storage."""
@@ -110,9 +210,11 @@ class Application:
         # Load tools from database
         tools = self.database.get_all_tool_definitions()
         
-        # Register tools with the API client
+        # Register tools with the API client once it exists
         enabled_tools = [tool for tool in tools if tool.get("enabled", False)]
-        self.api_client.register_tools(enabled_tools)
+        self._enabled_tools = enabled_tools
+        if "api_client" in self.__dict__:
+            self.api_client.register_tools(enabled_tools)
         
         logger.debug(f"Loaded {len(tools)} tools, {len(enabled_tools)} enabled")
     
@@ -146,6 +248,9 @@ class Application:
         Returns:
             The response from the API.
         """
+        EventType = _analytics.EventType
+        analytics = self.analytics
+        
         logger.debug(f"Sending message to Gemini API")
         
         if not self.app_state.is_authenticated:
@@ -158,13 +263,21 @@ class Application:
             if not conversation_id:
                 # Create a new conversation
                 conversation_id = self.database.create_conversation()
-                self.app_state.app_settings["current_conversation_id"] = conversation_id
+                self.app_state.update_settings({"current_conversation_id": conversation_id})
             
-            # Log message to database
-            message_id = self.database.add_message(conversation_id, "user", message)
+            # Log message to database; foreign keys are enforced, so a
+            # current conversation that was deleted is replaced
+            try:
+                message_id = self.database.add_message(conversation_id, "user", message)
+            except sqlite3.IntegrityError:
+                logger.warning(f"Conversation {conversation_id} no longer exists, starting a new one")
+                conversation_id = self.database.create_conversation()
+                self.app_state.update_settings({"current_conversation_id": conversation_id})
+                message_id = self.database.add_message(conversation_id, "user", message)
             
             # Log analytics event
-            self.analytics.log_event(EventType.MESSAGE_SENT, {"message_length": len(message)})
+            if analytics.enabled:
+                analytics.log_event(EventType.MESSAGE_SENT, {"message_length": len(message)})
             
             # Add to state (in memory)
             self.app_state.add_message({
@@ -177,26 +290,27 @@ class Application:
             history = self.app_state.conversation_history
             response = await self.api_client.send_message(message, history)
             
+            # Function calls are buffered and written with the response
+            function_calls = []
+            
             # Handle function calls in response
             if "function_calls" in response and response["function_calls"]:
                 # Process function calls
                 for function_call in response["function_calls"]:
-                    # Log function call to database
                     function_name = function_call.get("name", "unknown")
                     arguments = function_call.get("arguments", {})
                     
-                    call_id = self.database.add_function_call(message_id, function_name, arguments)
-                    
                     # Log analytics event
-                    self.analytics.log_function_call(function_name, arguments)
+                    if analytics.enabled:
+                        analytics.log_function_call(function_name, arguments)
                     
                     # Handle function execution (not implemented in this example)
                     # In a real implementation, this would execute the function
                     # or prompt the user for the result
                     
-                    # Update function call with result
+                    # Record function call with its result
                     result = {"result": "Function execution not implemented"}
-                    self.database.update_function_result(call_id, result)
+                    function_calls.append((function_name, arguments, result))
                     
                     # Send function response to API
                     function_response = {
@@ -207,11 +321,17 @@ class Application:
                     # Get updated response
                     response = await self.api_client.send_function_response(function_response, history)
             
-            # Log response to database
-            response_id = self.database.add_message(conversation_id, "gemini", response.get("text", ""))
+            # Log function calls and response to database in one transaction;
+            # it is opened only after the API calls so the write lock is not
+            # held while waiting on the network
+            with self.database.transaction():
+                if function_calls:
+                    self.database.add_function_calls_bulk(message_id, function_calls)
+                response_id = self.database.add_message(conversation_id, "gemini", response.get("text", ""))
             
             # Log analytics event
-            self.analytics.log_event(EventType.MESSAGE_RECEIVED, {"response_length": len(response.get("text", ""))})
+            if analytics.enabled:
+                analytics.log_event(EventType.MESSAGE_RECEIVED, {"response_length": len(response.get("text", ""))})
             
             # Add to state (in memory)
             self.app_state.add_message({
@@ -224,7 +344,8 @@ class Application:
             
         except Exception as e:
             logger.error(f"Error sending message: {e}")
-            self.analytics.log_error(str(e), "api_error")
+            if analytics.enabled:
+                analytics.log_error(str(e), "api_error")
             return {"error": str(e)}
     
     def shutdown(self):
@@ -236,14 +357,29 @@ class Application:
         """
         logger.info("Shutting down application")
         
-        # Log analytics event
-        self.analytics.log_event(EventType.APP_EXIT, {
-            "session_stats": self.analytics.get_session_stats()
-        })
+        # Log analytics event; analytics that were never used have no
+        # session worth recording
+        if "analytics" in self.__dict__:
+            analytics = self.analytics
+            if analytics.enabled:
+                analytics.log_event(_analytics.EventType.APP_EXIT, {
+                    "session_stats": analytics.get_session_stats()
+                })
+            analytics.close()
+        
+        # Stop the local executor's sandbox worker
+        if "local_executor" in self.__dict__:
+            self.local_executor.close()
         
         # Save settings
         # In a real implementation, this would save any pending changes
         
+        # Write out pending tool enable/disable changes
+        self.tool_manager.flush()
+        
+        # Close database connection
+        self.database.close()
+        
         logger.info("Application shutdown complete")
 
 def create_app(config_path: Optional[Path] = None) -> Application:
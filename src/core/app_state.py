@@ -0,0 +1,158 @@
+"""
+Application state module.
+
+This module holds the in-memory state shared across the application,
+including authentication status, active tools, conversation history and
+application settings.
+"""
+
+import logging
+import threading
+from collections import deque
+from types import MappingProxyType
+from typing import Dict, Any, Deque, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Settings used until they are overridden by stored or user settings
+_DEFAULT_SETTINGS = {
+    "theme": "system",
+    "save_history": True,
+    "max_history_items": 100,
+}
+
+class AppState:
+    """
+    Shared application state.
+    
+    AppState is a singleton: every instantiation returns the same object, so
+    all components see the same state. It may be first instantiated from
+    any thread; later instantiations take no lock.
+    """
+    
+    _instance: Optional["AppState"] = None
+    _instance_lock = threading.Lock()
+    
+    def __new__(cls):
+        """Return the shared instance, creating it on first use."""
+        instance = cls._instance
+        if instance is not None:
+            return instance
+        
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                instance._init_once()
+                cls._instance = instance
+        return cls._instance
+    
+    def _init_once(self):
+        """Initialize the state when the shared instance is created."""
+        logger.debug("Initializing AppState")
+        
+        # The key and its obfuscated form, computed once when the key is set
+        self._api_key: Optional[str] = None
+        self._api_key_display: Optional[str] = None
+        self._is_authenticated = False
+        
+        # Active tools by ID, in the order they were added
+        self._tools_by_id: Dict[str, Dict[str, Any]] = {}
+        
+        # Settings are changed only through update_settings
+        self._app_settings: Dict[str, Any] = dict(_DEFAULT_SETTINGS)
+        self._app_settings_view = MappingProxyType(self._app_settings)
+        
+        # Bounded by max_history_items; appending to a full history drops
+        # the oldest message
+        self._conversation_history: Deque[Dict[str, Any]] = deque(maxlen=self._app_settings["max_history_items"])
+    
+    @property
+    def api_key(self) -> Optional[str]:
+        """
+        The Gemini API key, obfuscated for display.
+        
+        Returns:
+            The last character of the key behind a mask, or None if unset.
+        """
+        return self._api_key_display
+    
+    @api_key.setter
+    def api_key(self, value: Optional[str]):
+        self._api_key = value
+        self._api_key_display = None if value is None else f"****{value[-1:]}"
+    
+    @property
+    def is_authenticated(self) -> bool:
+        """Whether the API key has been authenticated."""
+        return self._is_authenticated
+    
+    @is_authenticated.setter
+    def is_authenticated(self, value: bool):
+        self._is_authenticated = value
+    
+    @property
+    def active_tools(self) -> List[Dict[str, Any]]:
+        """
+        The active tools.
+        
+        Returns:
+            List of active tool definitions, in the order they were added.
+        """
+        return list(self._tools_by_id.values())
+    
+    def add_tool(self, tool: Dict[str, Any]):
+        """
+        Add a tool to the active tools, replacing any with the same ID.
+        
+        Args:
+            tool: The tool definition to add.
+        """
+        self._tools_by_id[tool["id"]] = tool
+        logger.debug(f"Added active tool: {tool['id']}")
+    
+    def remove_tool(self, tool_id: str):
+        """
+        Remove a tool from the active tools.
+        
+        Args:
+            tool_id: The ID of the tool to remove. Unknown IDs are ignored.
+        """
+        if self._tools_by_id.pop(tool_id, None) is not None:
+            logger.debug(f"Removed active tool: {tool_id}")
+    
+    @property
+    def conversation_history(self) -> Deque[Dict[str, Any]]:
+        """The messages of the current conversation, oldest first."""
+        return self._conversation_history
+    
+    def add_message(self, message: Dict[str, Any]):
+        """
+        Add a message to the conversation history.
+        
+        The oldest messages are dropped once the history holds more than the
+        max_history_items setting.
+        
+        Args:
+            message: The message to add.
+        """
+        self._conversation_history.append(message)
+    
+    def clear_conversation_history(self):
+        """Remove all messages from the conversation history."""
+        self._conversation_history.clear()
+    
+    @property
+    def app_settings(self) -> Mapping[str, Any]:
+        """The application settings, as a read-only live view."""
+        return self._app_settings_view
+    
+    def update_settings(self, settings: Dict[str, Any]):
+        """
+        Merge settings into the application settings.
+        
+        Args:
+            settings: The settings to change; others keep their values.
+        """
+        self._app_settings |= settings
+        if "max_history_items" in settings:
+            self._conversation_history = deque(self._conversation_history, maxlen=self._app_settings["max_history_items"])
@@ -5,18 +5,167 @@ This module provides secure execution of local scripts and commands
 with permission controls and sandboxing.
 """
 
-import json
+import functools
 import logging
 import os
-import subprocess
+import re
 import sys
-import tempfile
 from enum import Enum
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Union, Callable
 
+from .._sandbox_worker import SandboxWorkerPool
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 logger = logging.getLogger(__name__)
 
+# Function names that look like read operations (e.g. "read_file", "get_weather")
+_READ_ONLY_NAME_RE = re.compile(r"read|get")
+
+# Code fragments that disqualify a function from READ_ONLY execution
+_UNSAFE_PATTERNS = (
+    "open(", ".write(", "subprocess", "os.system", "eval(", "exec(", 
+    "import os", "import subprocess", "import shutil", "__import__"
+)
+
+# Scan function code for all unsafe patterns in a single pass
+if ahocorasick is not None:
+    _UNSAFE_AUTOMATON = ahocorasick.Automaton()
+    for _pattern in _UNSAFE_PATTERNS:
+        _UNSAFE_AUTOMATON.add_word(_pattern, _pattern)
+    _UNSAFE_AUTOMATON.make_automaton()
+    del _pattern
+    
+    def _find_unsafe_pattern(code: str) -> Optional[str]:
+        """Return the first unsafe pattern found in the code, if any."""
+        hit = next(_UNSAFE_AUTOMATON.iter(code), None)
+        return None if hit is None else hit[1]
+else:
+    _UNSAFE_RE = re.compile("|".join(map(re.escape, _UNSAFE_PATTERNS)))
+    
+    def _find_unsafe_pattern(code: str) -> Optional[str]:
+        """Return the first unsafe pattern found in the code, if any."""
+        match = _UNSAFE_RE.search(code)
+        return None if match is None else match.group(0)
+
+@functools.lru_cache(maxsize=1)
+def _sandbox_prefix() -> List[str]:
+    """
+    Get the command prefix used to run code in a sandbox.
+    
+    The available sandboxing tool is probed once per process.
+    
+    Returns:
+        The bubblewrap or firejail command prefix, or an empty list when
+        neither is available (or not on Linux).
+    """
+    if sys.platform != "linux":
+        return []
+    
+    # Use bubblewrap or firejail if available
+    if os.path.exists("/usr/bin/bwrap"):  # bubblewrap
+        return [
+            "/usr/bin/bwrap",
+            "--ro-bind", "/usr", "/usr",
+            "--ro-bind", "/lib", "/lib",
+            "--ro-bind", "/lib64", "/lib64",
+            "--proc", "/proc",
+            "--dev", "/dev",
+            "--unshare-all",
+            "--die-with-parent"
+        ]
+    
+    if os.path.exists("/usr/bin/firejail"):  # firejail
+        return [
+            "/usr/bin/firejail",
+            "--quiet",
+            "--private",
+            "--caps.drop=all",
+            "--disable-mnt"
+        ]
+    
+    return []
+
+@functools.lru_cache(maxsize=64)
+def _compile_function(function_code: str, function_name: str):
+    """
+    Compile function code for direct execution, memoizing the result.
+    
+    Args:
+        function_code: The Python code implementing the function.
+        function_name: The name of the function, used in tracebacks.
+        
+    Returns:
+        The compiled module-level code object.
+    """
+    return compile(function_code, f"<fn:{function_name}>", "exec")
+
+@functools.lru_cache(maxsize=32)
+def _placeholder_pattern(keys: frozenset) -> "re.Pattern":
+    """
+    Build a pattern matching every {key} placeholder for a set of keys.
+    
+    Args:
+        keys: The argument names that may appear as placeholders.
+        
+    Returns:
+        A compiled pattern capturing the key name of each placeholder.
+    """
+    alternatives = "|".join(re.escape(key) for key in sorted(keys, key=len, reverse=True))
+    return re.compile(r"\{(" + alternatives + r")\}")
+
+class SandboxWorker:
+    """
+    Sandboxed interpreters that execute functions on request.
+    
+    Warm worker processes are started under the sandboxing tool on first use
+    and reused for later calls, so the sandbox and interpreter start-up cost
+    is paid once rather than per call. Each call runs in a fresh process
+    forked from a worker, so calls share no interpreter state, and calls
+    from different threads run in parallel up to the pool size.
+    """
+    
+    def __init__(self, timeout: float = 10, size: Optional[int] = None):
+        """
+        Initialize the sandbox worker.
+        
+        Args:
+            timeout: Maximum execution time in seconds for a single call.
+            size: Maximum number of calls run at once; defaults to the
+                  number of CPUs.
+        """
+        self._timeout = timeout
+        self._pool = SandboxWorkerPool(size=size, command_prefix=_sandbox_prefix())
+    
+    def execute(self, function_name: str, function_code: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute a function in a fresh sandboxed process.
+        
+        Args:
+            function_name: The name of the function to execute.
+            function_code: The Python code implementing the function.
+            arguments: The arguments to pass to the function.
+            
+        Returns:
+            The function's response, with "success" and either "result" or
+            "error"/"traceback" entries, plus its captured "stdout" and
+            "stderr" and its "execution_time".
+            
+        Raises:
+            subprocess.TimeoutExpired: If the call exceeded the timeout.
+            RuntimeError: If the function's process died during the call, or
+                the worker died or sent a malformed response.
+        """
+        return self._pool.run(function_code, function_name, arguments, self._timeout)
+    
+    def stop(self):
+        """Terminate the worker processes, if running."""
+        self._pool.shutdown()
+
 class ExecutionPermission(Enum):
     """Enumeration of permission levels for local execution."""
     
@@ -37,10 +186,28 @@ class ExecutionPermission(Enum):
             The corresponding ExecutionPermission enum value.
             Defaults to NONE if the value is not recognized.
         """
-        try:
-            return cls(value.lower())
-        except ValueError:
-            return cls.NONE
+        return _permission_from_string(value)
+
+@functools.lru_cache(maxsize=16)
+def _permission_from_string(value: str) -> ExecutionPermission:
+    """
+    Convert a string to an ExecutionPermission, memoizing the result.
+    
+    Args:
+        value: The string value to convert.
+        
+    Returns:
+        The corresponding ExecutionPermission, or NONE if not recognized.
+    """
+    try:
+        return ExecutionPermission(value.lower())
+    except ValueError:
+        return ExecutionPermission.NONE
+
+# Pre-warm the cache with the canonical permission strings
+for _permission in ExecutionPermission:
+    _permission_from_string(_permission.value)
+del _permission
 
 class LocalExecutor:
     """
@@ -68,6 +235,7 @@ class LocalExecutor:
         self._sandbox_enabled = sandbox_enabled
         self._user_confirmation_callback = user_confirmation_callback
         self._function_permissions: Dict[str, ExecutionPermission] = {}
+        self._sandbox_worker = SandboxWorker()
         
         logger.debug(f"LocalExecutor initialized with default permission: {default_permission.value}")
     
@@ -138,25 +306,17 @@ class LocalExecutor:
         # Execute the function based on permission level
         if permission == ExecutionPermission.READ_ONLY:
             # Only allow functions with "read" or "get" operations
-            if not (function_name.startswith("read_") or 
-                   function_name.startswith("get_") or 
-                   "read" in function_name or 
-                   "get" in function_name):
+            if not _READ_ONLY_NAME_RE.search(function_name):
                 result["error"] = f"Execution not allowed: Function '{function_name}' does not appear to be read-only"
                 logger.warning(f"Execution denied for '{function_name}': Not a read-only function")
                 return result
             
             # Scan function code for potentially unsafe operations
-            unsafe_patterns = [
-                "open(", ".write(", "subprocess", "os.system", "eval(", "exec(", 
-                "import os", "import subprocess", "import shutil", "__import__"
-            ]
-            
-            for pattern in unsafe_patterns:
-                if pattern in function_code:
-                    result["error"] = f"Execution not allowed: Function code contains potentially unsafe operation: {pattern}"
-                    logger.warning(f"Execution denied for '{function_name}': Contains unsafe pattern '{pattern}'")
-                    return result
+            pattern = _find_unsafe_pattern(function_code)
+            if pattern is not None:
+                result["error"] = f"Execution not allowed: Function code contains potentially unsafe operation: {pattern}"
+                logger.warning(f"Execution denied for '{function_name}': Contains unsafe pattern '{pattern}'")
+                return result
         
         # Actually execute the function
         if self._sandbox_enabled:
@@ -194,8 +354,9 @@ class LocalExecutor:
             # Create a namespace for the function
             namespace = {}
             
-            # Execute the function code in the namespace
-            exec(function_code, namespace)
+            # Execute the function code in the namespace; the compiled code
+            # is reused when the same function is executed again
+            exec(_compile_function(function_code, function_name), namespace)
             
             # Check if the function exists in the namespace
             if function_name not in namespace:
@@ -227,8 +388,8 @@ class LocalExecutor:
         """
         Execute a function in a sandboxed environment.
         
-        This method runs the function in a separate process with restricted
-        permissions for better security.
+        This method runs the function in a fresh process forked from a
+        long-lived worker with restricted permissions for better security.
         
         Args:
             function_name: The name of the function to execute.
@@ -238,6 +399,8 @@ class LocalExecutor:
         Returns:
             A dictionary containing the execution results.
         """
+        import subprocess
+        
         logger.debug(f"Executing function '{function_name}' in sandbox")
         
         result = {
@@ -247,118 +410,24 @@ class LocalExecutor:
         }
         
         try:
-            # Create a temporary file for the function code
-            with tempfile.NamedTemporaryFile(suffix='.py', delete=False, mode='w') as temp_file:
-                temp_file_path = temp_file.name
-                
-                # Prepare the sandbox script
-                sandbox_script = f"""
-import sys
-import json
-import traceback
-
-# The function code provided by the user
-{function_code}
-
-# Execute the function with provided arguments
-if __name__ == "__main__":
-    try:
-        # Parse arguments from command line
-        args_json = sys.argv[1]
-        args = json.loads(args_json)
-        
-        # Call the function with the arguments
-        result = {function_name}(**args)
+            # Run the function in a sandbox worker
+            output = self._sandbox_worker.execute(function_name, function_code, arguments)
+            result.update(output)
         
-        # Return the result as JSON
-        print(json.dumps({{"success": True, "result": result}}))
-        
-    except Exception as e:
-        error_msg = str(e)
-        traceback_str = traceback.format_exc()
-        
-        print(json.dumps({{"success": False, "error": error_msg, "traceback": traceback_str}}))
-"""
-                
-                temp_file.write(sandbox_script)
-            
-            # Run the sandbox script in a subprocess
-            try:
-                args_json = json.dumps(arguments)
-                
-                # Determine sandboxing method based on platform
-                if sys.platform == "linux":
-                    # Use bubblewrap or firejail if available
-                    if os.path.exists("/usr/bin/bwrap"):  # bubblewrap
-                        cmd = [
-                            "/usr/bin/bwrap",
-                            "--ro-bind", "/usr", "/usr",
-                            "--ro-bind", "/lib", "/lib",
-                            "--ro-bind", "/lib64", "/lib64",
-                            "--proc", "/proc",
-                            "--dev", "/dev",
-                            "--unshare-all",
-                            "--die-with-parent",
-                            sys.executable, temp_file_path, args_json
-                        ]
-                    elif os.path.exists("/usr/bin/firejail"):  # firejail
-                        cmd = [
-                            "/usr/bin/firejail",
-                            "--quiet",
-                            "--private",
-                            "--caps.drop=all",
-                            "--disable-mnt",
-                            sys.executable, temp_file_path, args_json
-                        ]
-                    else:  # fallback to regular python
-                        cmd = [sys.executable, temp_file_path, args_json]
-                else:
-                    # For non-Linux platforms, just use regular python
-                    cmd = [sys.executable, temp_file_path, args_json]
-                
-                # Execute the command
-                process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                
-                stdout, stderr = process.communicate(timeout=10)  # 10-second timeout
-                
-                if process.returncode == 0:
-                    try:
-                        output = json.loads(stdout)
-                        result.update(output)
-                    except json.JSONDecodeError:
-                        result["error"] = "Failed to parse function output"
-                        logger.error(f"Failed to parse output from function '{function_name}'")
-                else:
-                    result["error"] = f"Function process exited with code {process.returncode}"
-                    result["stderr"] = stderr
-                    logger.error(f"Function '{function_name}' exited with code {process.returncode}: {stderr}")
-            
-            except subprocess.TimeoutExpired:
-                result["error"] = "Function execution timed out"
-                logger.error(f"Function '{function_name}' execution timed out")
-            
-            except Exception as e:
-                result["error"] = f"Error executing function: {str(e)}"
-                logger.error(f"Error executing function '{function_name}': {str(e)}")
-            
-            finally:
-                # Clean up temporary file
-                try:
-                    os.unlink(temp_file_path)
-                except Exception as e:
-                    logger.warning(f"Failed to remove temporary file {temp_file_path}: {str(e)}")
+        except subprocess.TimeoutExpired:
+            result["error"] = "Function execution timed out"
+            logger.error(f"Function '{function_name}' execution timed out")
         
         except Exception as e:
-            result["error"] = f"Error preparing sandbox: {str(e)}"
-            logger.error(f"Error preparing sandbox for function '{function_name}': {str(e)}")
+            result["error"] = f"Error executing function: {str(e)}"
+            logger.error(f"Error executing function '{function_name}': {str(e)}")
         
         return result
     
+    def close(self):
+        """Stop the sandbox worker process."""
+        self._sandbox_worker.stop()
+    
     def execute_command(self, command: str, arguments: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Execute a system command with the given arguments.
@@ -373,6 +442,8 @@ if __name__ == "__main__":
         Returns:
             A dictionary containing the execution results.
         """
+        import subprocess
+        
         logger.debug(f"Executing command: {command}")
         
         result = {
@@ -403,22 +474,25 @@ if __name__ == "__main__":
         try:
             # Format command with arguments if provided
             if arguments:
-                for key, value in arguments.items():
-                    # Simple string replacement - in a real implementation,
-                    # we would use a more secure method for argument substitution
-                    placeholder = f"{{{key}}}"
-                    command = command.replace(placeholder, str(value))
+                # Simple string replacement - in a real implementation,
+                # we would use a more secure method for argument substitution
+                pattern = _placeholder_pattern(frozenset(arguments))
+                command = pattern.sub(lambda m: str(arguments[m.group(1)]), command)
             
-            # Execute the command
-            process = subprocess.Popen(
+            # Execute the command; leaving the block closes the pipes and
+            # reaps the process, including after a timeout
+            with subprocess.Popen(
                 command,
                 shell=True,  # Using shell=True is generally discouraged for security reasons
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True
-            )
-            
-            stdout, stderr = process.communicate(timeout=30)  # 30-second timeout
+            ) as process:
+                try:
+                    stdout, stderr = process.communicate(timeout=30)  # 30-second timeout
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    raise
             
             result["stdout"] = stdout
             result["stderr"] = stderr
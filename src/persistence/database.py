@@ -9,12 +9,258 @@ import logging
 import os
 import sqlite3
 import json
-from datetime import datetime
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union, Tuple
+from typing import Dict, Any, Iterator, List, Optional, Union, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 logger = logging.getLogger(__name__)
 
+# JSON codec for stored function arguments and results, which are returned as
+# text, and the fallback for schemas and settings; orjson's decode errors
+# subclass json.JSONDecodeError, so callers catch either
+if orjson is not None:
+    def _dumps(obj: Any) -> str:
+        """Serialize an object to a JSON string."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    _loads = orjson.loads
+else:
+    _dumps = json.dumps
+    _loads = json.loads
+
+# Codec for stored schemas and settings values. With msgpack they are written
+# as BLOBs; reads tell the formats apart by storage class, so rows written as
+# JSON text stay readable. Decode errors of both codecs are ValueErrors.
+if msgpack is not None:
+    def _pack(obj: Any) -> bytes:
+        """Serialize an object to msgpack bytes."""
+        return msgpack.packb(obj, use_bin_type=True)
+else:
+    _pack = _dumps
+
+def _unpack(data: Union[bytes, str]) -> Any:
+    """
+    Deserialize a stored value written by _pack.
+    
+    Args:
+        data: msgpack bytes, or JSON text.
+        
+    Returns:
+        The deserialized value.
+        
+    Raises:
+        ValueError: If the data cannot be decoded.
+    """
+    if isinstance(data, bytes):
+        if msgpack is None:
+            raise ValueError("msgpack is required to read this value")
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    return _loads(data)
+
+def _copy_parsed(value: Any) -> Any:
+    """
+    Copy a value produced by _unpack.
+    
+    Decoded values only nest dicts and lists around immutable scalars, so
+    this is cheaper than copy.deepcopy.
+    
+    Args:
+        value: The decoded value.
+        
+    Returns:
+        A copy sharing no mutable containers with the value.
+    """
+    if isinstance(value, dict):
+        return {k: _copy_parsed(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_parsed(v) for v in value]
+    return value
+
+def _encode_setting(value: Any) -> Tuple[str, Optional[int], Optional[float], Optional[str], Optional[Union[bytes, str]]]:
+    """
+    Split a setting value into the settings table's typed columns.
+    
+    Scalars go into their own column so reading them needs no parsing; other
+    values are serialized into value_json.
+    
+    Args:
+        value: The setting value.
+        
+    Returns:
+        A (type, value_int, value_real, value_text, value_json) tuple.
+    """
+    if isinstance(value, bool):
+        return ("bool", int(value), None, None, None)
+    if isinstance(value, int) and -2 ** 63 <= value < 2 ** 63:
+        return ("int", value, None, None, None)
+    if isinstance(value, float):
+        return ("real", None, value, None, None)
+    if isinstance(value, str):
+        return ("text", None, None, value, None)
+    return ("json", None, None, None, _pack(value))
+
+# Per-connection settings, applied whenever a connection is opened.
+# journal_mode=WAL is persistent and set once in _create_tables_if_not_exist.
+# With WAL, commits append to the -wal file and are copied back into the
+# database by a checkpoint every 1000 pages (wal_autocheckpoint); with
+# synchronous=NORMAL only checkpoints fsync, so a power loss can drop the
+# last commits but never corrupts the database
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA wal_autocheckpoint=1000",
+)
+
+# Parsed settings values and tool schemas kept per Database, reused while the
+# row's updated_at is unchanged
+_PARSED_CACHE_SIZE = 128
+
+# Rows fetched per batch when streaming query results
+_FETCH_BATCH_SIZE = 256
+
+# Schema version stored in PRAGMA user_version; bump it when the schema
+# changes so existing databases are brought up to date on open
+_SCHEMA_VERSION = 2
+
+# INSERT ... RETURNING needs SQLite 3.35 or later
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Compiled statements kept per connection; sqlite3 looks them up by SQL text,
+# so every statement is a fixed module constant
+_STATEMENT_CACHE_SIZE = 256
+
+# Current local time in the ISO 8601 form used for every timestamp column,
+# computed by SQLite rather than formatted in Python and bound per call
+_SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+
+# Conversations
+_SQL_INSERT_CONVERSATION = f"INSERT INTO conversations (title, created_at, updated_at) VALUES (?, {_SQL_NOW}, {_SQL_NOW})"
+_SQL_UPDATE_CONV_TITLE = f"UPDATE conversations SET title = ?, updated_at = {_SQL_NOW} WHERE id = ?"
+_SQL_UPDATE_CONV_TS = f"UPDATE conversations SET updated_at = {_SQL_NOW} WHERE id = ?"
+_SQL_DELETE_FC_BY_CONV = "DELETE FROM function_calls WHERE message_id IN (SELECT id FROM messages WHERE conversation_id = ?)"
+_SQL_DELETE_MESSAGES_BY_CONV = "DELETE FROM messages WHERE conversation_id = ?"
+_SQL_DELETE_CONV = "DELETE FROM conversations WHERE id = ?"
+_SQL_SELECT_CONV_BY_ID = "SELECT id, title, created_at, updated_at FROM conversations WHERE id = ?"
+_SQL_SELECT_CONVERSATIONS = """
+SELECT c.id, c.title, c.created_at, c.updated_at, COUNT(m.id) AS message_count 
+FROM conversations c 
+LEFT JOIN messages m ON m.conversation_id = c.id 
+GROUP BY c.id 
+ORDER BY c.updated_at DESC
+"""
+
+# Messages and function calls
+_SQL_INSERT_MESSAGE = f"INSERT INTO messages (conversation_id, type, content, timestamp) VALUES (?, ?, ?, {_SQL_NOW})"
+_SQL_INSERT_FUNCTION_CALL = f"INSERT INTO function_calls (message_id, function_name, function_args, function_result, timestamp) VALUES (?, ?, ?, ?, {_SQL_NOW})"
+_SQL_UPDATE_FUNCTION_RESULT = "UPDATE function_calls SET function_result = ? WHERE id = ?"
+_SQL_MESSAGES_WITH_CALLS = """
+SELECT m.id, m.conversation_id, m.type, m.content, m.timestamp, 
+       fc.id, fc.function_name, fc.function_args, fc.function_result, fc.timestamp 
+FROM messages m 
+LEFT JOIN function_calls fc ON fc.message_id = m.id 
+WHERE m.conversation_id = ? 
+ORDER BY m.timestamp ASC, m.id ASC, fc.timestamp ASC, fc.id ASC
+"""
+
+# Settings
+_SQL_GET_SETTING = "SELECT type, value_int, value_real, value_text, value_json, updated_at FROM settings WHERE key = ?"
+_SQL_SET_SETTING = f"""
+INSERT INTO settings (key, type, value_int, value_real, value_text, value_json, updated_at) 
+VALUES (?, ?, ?, ?, ?, ?, {_SQL_NOW}) 
+ON CONFLICT(key) DO UPDATE SET type = excluded.type, value_int = excluded.value_int, 
+value_real = excluded.value_real, value_text = excluded.value_text, 
+value_json = excluded.value_json, updated_at = excluded.updated_at
+"""
+_SQL_DELETE_SETTING = "DELETE FROM settings WHERE key = ?"
+_SQL_SELECT_SETTINGS = "SELECT key, type, value_int, value_real, value_text, value_json, updated_at FROM settings"
+_SQL_SELECT_LEGACY_SETTINGS = "SELECT key, value, updated_at FROM settings"
+_SQL_MIGRATE_SETTING = """
+INSERT INTO settings (key, type, value_int, value_real, value_text, value_json, updated_at) 
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Tool definitions
+_SQL_UPSERT_TOOL = f"""
+INSERT INTO tool_definitions (id, name, description, schema, enabled, created_at, updated_at) 
+VALUES (?, ?, ?, ?, ?, {_SQL_NOW}, {_SQL_NOW}) 
+ON CONFLICT(id) DO UPDATE SET name = excluded.name, description = excluded.description, 
+schema = excluded.schema, enabled = excluded.enabled, updated_at = excluded.updated_at
+"""
+_SQL_INSERT_TOOL_VERSION = f"""
+INSERT INTO tool_versions (tool_id, version, schema, created_at) 
+VALUES (?, (SELECT COALESCE(MAX(version), 0) + 1 FROM tool_versions WHERE tool_id = ?), ?, {_SQL_NOW})
+""" + ("RETURNING version" if _HAS_RETURNING else "")
+_SQL_SELECT_VERSION_BY_ROWID = "SELECT version FROM tool_versions WHERE id = ?"
+_SQL_SELECT_TOOL_BY_ID = "SELECT id, name, description, schema, enabled, created_at, updated_at FROM tool_definitions WHERE id = ?"
+_SQL_SELECT_TOOL_VERSIONS = "SELECT id, tool_id, version, schema, created_at FROM tool_versions WHERE tool_id = ? ORDER BY version DESC"
+_SQL_SELECT_TOOL_VERSION = "SELECT id, tool_id, version, schema, created_at FROM tool_versions WHERE tool_id = ? AND version = ?"
+_SQL_DELETE_TOOL_VERSIONS = "DELETE FROM tool_versions WHERE tool_id = ?"
+_SQL_DELETE_TOOL = "DELETE FROM tool_definitions WHERE id = ?"
+
+# Tool listing statements, keyed by (enabled_only, include_schema); the
+# schema column comes last so rows unpack the same way either way
+_SQL_SELECT_TOOLS = {
+    (enabled_only, include_schema): (
+        "SELECT id, name, description, enabled, created_at, updated_at"
+        + (", schema" if include_schema else "")
+        + " FROM tool_definitions"
+        + (" WHERE enabled = 1" if enabled_only else "")
+    )
+    for enabled_only in (False, True)
+    for include_schema in (False, True)
+}
+
+class _TransactionConnection:
+    """
+    Connection handed to Database methods inside Database.transaction().
+    
+    Delegates to the shared connection, but using it as a context manager
+    neither commits nor rolls back, so the statements of every method called
+    inside the block share one transaction.
+    """
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+    
+    def __enter__(self) -> "_TransactionConnection":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        return False
+
+class _ReaderSlot:
+    """
+    Holder of one thread's read-only connection.
+    
+    The slot lives in the thread's threading.local storage, so it is freed
+    when the thread exits, and its finalizer then closes the connection.
+    The connection itself is part of a reference cycle and would otherwise
+    stay open until the garbage collector ran.
+    """
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.close = weakref.finalize(self, conn.close)
+
 class Database:
     """
     Database manager for the application.
@@ -40,6 +286,26 @@ class Database:
         else:
             self._db_path = Path(db_path)
         
+        # One long-lived connection keeps SQLite's page cache warm between
+        # calls; writes and transactions are serialized by the lock
+        self._conn = sqlite3.connect(
+            self._db_path,
+            check_same_thread=False,
+            cached_statements=_STATEMENT_CACHE_SIZE
+        )
+        self._configure_connection(self._conn)
+        self._lock = threading.RLock()
+        
+        # Per-thread state; marks the thread that has a transaction() open
+        # and holds the thread's read connection
+        self._local = threading.local()
+        self._readers: "weakref.WeakSet[_ReaderSlot]" = weakref.WeakSet()
+        
+        # Parsed values by row key, as (updated_at, value) pairs in LRU order
+        self._settings_cache: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+        self._schema_cache: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
         logger.debug(f"Database initialized with path: {self._db_path}")
         
         # Initialize database
@@ -50,18 +316,264 @@ class Database:
         Get a database connection.
         
         Returns:
-            A SQLite connection object.
+            The shared SQLite connection. Write methods use it as a context
+            manager, committing on success and rolling back on error; inside
+            transaction() it is wrapped so that they do neither.
         """
-        conn = sqlite3.connect(self._db_path)
-        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-        return conn
+        conn = getattr(self._local, "transaction", None)
+        if conn is not None:
+            return conn
+        
+        return self._conn
+    
+    def _reader(self) -> sqlite3.Connection:
+        """
+        Get this thread's read-only connection.
+        
+        WAL lets any number of readers run alongside the writer, so reads use
+        a connection per thread instead of queueing on the shared one.
+        
+        Returns:
+            A read-only SQLite connection. Inside transaction(), this is the
+            transaction's connection, so the thread sees its own writes.
+        """
+        conn = getattr(self._local, "transaction", None)
+        if conn is not None:
+            return conn
+        
+        slot = getattr(self._local, "reader", None)
+        if slot is None:
+            conn = sqlite3.connect(
+                self._db_path,
+                check_same_thread=False,
+                cached_statements=_STATEMENT_CACHE_SIZE
+            )
+            self._configure_connection(conn)
+            conn.execute("PRAGMA query_only=ON")
+            slot = self._local.reader = _ReaderSlot(conn)
+            with self._lock:
+                self._readers.add(slot)
+        return slot.conn
+    
+    def _exec(self, sql: str, params: Tuple = ()) -> sqlite3.Cursor:
+        """
+        Run a single write statement in its own transaction.
+        
+        Inside transaction(), the statement joins the open transaction instead.
+        
+        Args:
+            sql: The statement to run.
+            params: The statement's parameters.
+            
+        Returns:
+            The cursor, for lastrowid and rowcount.
+        """
+        with self._lock:
+            conn = self._get_connection()
+            with conn:
+                return conn.execute(sql, params)
+    
+    def _fetchone(self, sql: str, params: Tuple = ()) -> Optional[Tuple]:
+        """
+        Run a query on this thread's reader and return its first row.
+        
+        Args:
+            sql: The query to run.
+            params: The query's parameters.
+            
+        Returns:
+            The first row, or None if there are no rows.
+        """
+        return self._reader().execute(sql, params).fetchone()
+    
+    def _fetchall(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        """
+        Run a query on this thread's reader and return all rows.
+        
+        Args:
+            sql: The query to run.
+            params: The query's parameters.
+            
+        Returns:
+            The rows.
+        """
+        return self._reader().execute(sql, params).fetchall()
+    
+    def _parse_cached(self, cache: "OrderedDict[str, Tuple[str, Any]]", key: str, updated_at: str, data: Union[bytes, str]) -> Any:
+        """
+        Parse a stored value, reusing the previous result while the row is unchanged.
+        
+        Each caller gets its own copy, so modifying it leaves the cache intact.
+        
+        Args:
+            cache: The cache to use (settings or tool schemas).
+            key: The key of the row the value was read from.
+            updated_at: The row's updated_at value.
+            data: The stored msgpack bytes or JSON text.
+            
+        Returns:
+            The parsed value.
+            
+        Raises:
+            ValueError: If the data cannot be decoded.
+        """
+        with self._cache_lock:
+            entry = cache.get(key)
+            if entry is not None and entry[0] == updated_at:
+                cache.move_to_end(key)
+                return _copy_parsed(entry[1])
+        
+        value = _unpack(data)
+        
+        with self._cache_lock:
+            cache[key] = (updated_at, value)
+            cache.move_to_end(key)
+            if len(cache) > _PARSED_CACHE_SIZE:
+                cache.popitem(last=False)
+        return _copy_parsed(value)
+    
+    def _decode_setting(self, key: str, row: Tuple) -> Any:
+        """
+        Read a setting value from its typed columns.
+        
+        Args:
+            key: The setting key.
+            row: The (type, value_int, value_real, value_text, value_json,
+                updated_at) columns of the setting's row.
+            
+        Returns:
+            The setting value.
+        """
+        value_type = row[0]
+        if value_type == "bool":
+            return bool(row[1])
+        if value_type == "int":
+            return row[1]
+        if value_type == "real":
+            return row[2]
+        if value_type == "text":
+            return row[3]
+        
+        # Fall back to the raw stored value if it cannot be parsed
+        try:
+            return self._parse_cached(self._settings_cache, key, row[5], row[4])
+        except ValueError:
+            logger.warning(f"Invalid stored value for setting {key}")
+            return row[4]
+    
+    def _invalidate_cached(self, cache: "OrderedDict[str, Tuple[str, Any]]", key: str):
+        """
+        Drop a row's parsed value after it was written or deleted.
+        
+        Args:
+            cache: The cache to remove the entry from.
+            key: The key of the row.
+        """
+        with self._cache_lock:
+            cache.pop(key, None)
+    
+    @staticmethod
+    def _insert_many(cursor: sqlite3.Cursor, sql: str, rows: List[Tuple]) -> List[int]:
+        """
+        Insert several rows and return their IDs.
+        
+        Must be called inside a transaction.
+        
+        Args:
+            cursor: The cursor to insert with.
+            sql: The INSERT statement, without a RETURNING clause.
+            rows: The parameters for each row.
+            
+        Returns:
+            The IDs of the inserted rows, in order.
+        """
+        if _HAS_RETURNING:
+            sql += " RETURNING id"
+            return [cursor.execute(sql, row).fetchone()[0] for row in rows]
+        
+        # The write lock is held for the whole transaction, so the
+        # AUTOINCREMENT IDs of the batch are consecutive
+        cursor.executemany(sql, rows)
+        last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+    
+    @staticmethod
+    def _configure_connection(conn: sqlite3.Connection):
+        """
+        Apply the per-connection PRAGMAs to a new connection.
+        
+        Args:
+            conn: The connection to configure.
+        """
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+    
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Run several database operations in a single transaction.
+        
+        Methods called on this thread inside the block share one connection
+        and are committed together when the block exits, or rolled back if
+        it raises. Nested blocks join the outer transaction.
+        """
+        if getattr(self._local, "transaction", None) is not None:
+            yield
+            return
+        
+        with self._lock:
+            conn = self._conn
+            
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                self._local.transaction = _TransactionConnection(conn)
+                try:
+                    yield
+                finally:
+                    self._local.transaction = None
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Transaction rolled back: {e}")
+                raise
+    
+    def close(self):
+        """Close the database connection and every thread's read connection."""
+        with self._lock:
+            for slot in list(self._readers):
+                slot.close()
+            self._readers.clear()
+            self._conn.close()
+        logger.debug(f"Closed database: {self._db_path}")
     
     def _create_tables_if_not_exist(self):
-        """Create database tables if they don't exist."""
+        """
+        Create database tables if they don't exist.
+        
+        Databases already at the current schema version are left untouched,
+        so opening one costs a single PRAGMA read.
+        """
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
             
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] >= _SCHEMA_VERSION:
+                logger.debug("Database schema is up to date")
+                return
+            
+            # Write-ahead logging lets readers proceed during writes and turns
+            # each commit into a single append; the mode is stored in the file
+            cursor.execute("PRAGMA journal_mode=WAL")
+            
+            # Run the whole upgrade in one transaction, so a failed migration
+            # leaves the previous schema intact
+            cursor.execute("BEGIN")
+            
+            # Settings stored before the typed columns existed are read here
+            # and written back once the new table exists
+            legacy_settings = self._take_legacy_settings(cursor)
+            
             # Conversations table
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS conversations (
@@ -101,10 +613,15 @@ class Database:
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS settings (
                 key TEXT PRIMARY KEY,
-                value TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value_int INTEGER,
+                value_real REAL,
+                value_text TEXT,
+                value_json BLOB,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
             ''')
+            cursor.executemany(_SQL_MIGRATE_SETTING, legacy_settings)
             
             # Tool definitions table
             cursor.execute('''
@@ -131,14 +648,60 @@ class Database:
             )
             ''')
             
+            # Indexes for the foreign-key lookups; the trailing columns match
+            # the ORDER BY of the queries so results come back without a sort
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_messages_conv ON messages (conversation_id, timestamp)
+            ''')
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_function_calls_msg ON function_calls (message_id, timestamp)
+            ''')
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_tool_versions_tool ON tool_versions (tool_id, version DESC)
+            ''')
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_tool_definitions_enabled ON tool_definitions (enabled) WHERE enabled = 1
+            ''')
+            
+            cursor.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            
             conn.commit()
             logger.info("Database tables created/verified successfully")
             
         except Exception as e:
             logger.error(f"Error creating database tables: {e}")
             raise
-        finally:
-            conn.close()
+    
+    @staticmethod
+    def _take_legacy_settings(cursor: sqlite3.Cursor) -> List[Tuple]:
+        """
+        Read and drop a settings table that keeps every value in one column.
+        
+        Values are decoded the way get_setting used to read them, then split
+        into typed columns.
+        
+        Args:
+            cursor: A cursor inside the schema upgrade transaction.
+            
+        Returns:
+            Rows for _SQL_MIGRATE_SETTING; empty if there was nothing to migrate.
+        """
+        cursor.execute("PRAGMA table_info(settings)")
+        if "value" not in {column[1] for column in cursor.fetchall()}:
+            return []
+        
+        cursor.execute(_SQL_SELECT_LEGACY_SETTINGS)
+        rows = []
+        for key, value, updated_at in cursor.fetchall():
+            try:
+                value = _unpack(value)
+            except ValueError:
+                pass
+            rows.append((key,) + _encode_setting(value) + (updated_at,))
+        
+        cursor.execute("DROP TABLE settings")
+        logger.info(f"Migrating {len(rows)} settings to typed columns")
+        return rows
     
     # Conversation Methods
     
@@ -153,26 +716,13 @@ class Database:
             The ID of the created conversation.
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            now = datetime.now().isoformat()
-            cursor.execute(
-                "INSERT INTO conversations (title, created_at, updated_at) VALUES (?, ?, ?)",
-                (title or "Conversation", now, now)
-            )
-            
-            conversation_id = cursor.lastrowid
-            conn.commit()
-            
+            conversation_id = self._exec(_SQL_INSERT_CONVERSATION, (title or "Conversation",)).lastrowid
             logger.debug(f"Created conversation with ID: {conversation_id}")
             return conversation_id
             
         except Exception as e:
             logger.error(f"Error creating conversation: {e}")
             raise
-        finally:
-            conn.close()
     
     def update_conversation(self, conversation_id: int, title: str) -> bool:
         """
@@ -186,17 +736,7 @@ class Database:
             True if the update was successful, False otherwise.
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            now = datetime.now().isoformat()
-            cursor.execute(
-                "UPDATE conversations SET title = ?, updated_at = ? WHERE id = ?",
-                (title, now, conversation_id)
-            )
-            
-            success = cursor.rowcount > 0
-            conn.commit()
+            success = self._exec(_SQL_UPDATE_CONV_TITLE, (title, conversation_id)).rowcount > 0
             
             if success:
                 logger.debug(f"Updated conversation {conversation_id} with title: {title}")
@@ -208,8 +748,6 @@ class Database:
         except Exception as e:
             logger.error(f"Error updating conversation {conversation_id}: {e}")
             return False
-        finally:
-            conn.close()
     
     def delete_conversation(self, conversation_id: int) -> bool:
         """
@@ -221,40 +759,33 @@ class Database:
         Returns:
             True if the deletion was successful, False otherwise.
         """
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # First, get all message IDs to delete related function calls
-            cursor.execute("SELECT id FROM messages WHERE conversation_id = ?", (conversation_id,))
-            message_ids = [row["id"] for row in cursor.fetchall()]
-            
-            # Delete function calls related to these messages
-            if message_ids:
-                placeholders = ", ".join("?" for _ in message_ids)
-                cursor.execute(f"DELETE FROM function_calls WHERE message_id IN ({placeholders})", message_ids)
-            
-            # Delete all messages in the conversation
-            cursor.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
-            
-            # Delete the conversation
-            cursor.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
-            
-            success = cursor.rowcount > 0
-            conn.commit()
-            
-            if success:
-                logger.debug(f"Deleted conversation with ID: {conversation_id}")
-            else:
-                logger.warning(f"No conversation found with ID: {conversation_id}")
-            
-            return success
-            
-        except Exception as e:
-            logger.error(f"Error deleting conversation {conversation_id}: {e}")
-            return False
-        finally:
-            conn.close()
+        with self._lock:
+            try:
+                conn = self._get_connection()
+                with conn:
+                    cursor = conn.cursor()
+                    
+                    # Delete function calls related to the conversation's messages
+                    cursor.execute(_SQL_DELETE_FC_BY_CONV, (conversation_id,))
+                    
+                    # Delete all messages in the conversation
+                    cursor.execute(_SQL_DELETE_MESSAGES_BY_CONV, (conversation_id,))
+                    
+                    # Delete the conversation
+                    cursor.execute(_SQL_DELETE_CONV, (conversation_id,))
+                    
+                    success = cursor.rowcount > 0
+                
+                if success:
+                    logger.debug(f"Deleted conversation with ID: {conversation_id}")
+                else:
+                    logger.warning(f"No conversation found with ID: {conversation_id}")
+                
+                return success
+                
+            except Exception as e:
+                logger.error(f"Error deleting conversation {conversation_id}: {e}")
+                return False
     
     def get_conversation(self, conversation_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -267,39 +798,18 @@ class Database:
             A dictionary containing the conversation details, or None if not found.
         """
         try:
-            conn = self._get_connection()
+            conn = self._reader()
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row  # Return rows as dictionaries
             
-            cursor.execute("SELECT * FROM conversations WHERE id = ?", (conversation_id,))
+            cursor.execute(_SQL_SELECT_CONV_BY_ID, (conversation_id,))
             row = cursor.fetchone()
             
             if row:
                 conversation = dict(row)
                 
                 # Get all messages for this conversation
-                cursor.execute("""
-                    SELECT * FROM messages 
-                    WHERE conversation_id = ? 
-                    ORDER BY timestamp ASC
-                """, (conversation_id,))
-                
-                messages = []
-                for msg_row in cursor.fetchall():
-                    message = dict(msg_row)
-                    
-                    # Get function calls for this message
-                    cursor.execute("""
-                        SELECT * FROM function_calls 
-                        WHERE message_id = ? 
-                        ORDER BY timestamp ASC
-                    """, (message["id"],))
-                    
-                    function_calls = [dict(fc_row) for fc_row in cursor.fetchall()]
-                    if function_calls:
-                        message["function_calls"] = function_calls
-                    
-                    messages.append(message)
-                
+                messages = list(self.iter_conversation_messages(conversation_id))
                 conversation["messages"] = messages
                 
                 logger.debug(f"Retrieved conversation {conversation_id} with {len(messages)} messages")
@@ -311,8 +821,60 @@ class Database:
         except Exception as e:
             logger.error(f"Error retrieving conversation {conversation_id}: {e}")
             return None
-        finally:
-            conn.close()
+    
+    def iter_conversation_messages(self, conversation_id: int) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over a conversation's messages without loading them all at once.
+        
+        Messages and their function calls are read with one query, fetched in
+        batches, so memory use stays bounded when paging through long
+        conversations.
+        
+        Args:
+            conversation_id: The ID of the conversation.
+            
+        Yields:
+            Message dictionaries in conversation order; messages with function
+            calls have them in a "function_calls" list.
+        """
+        try:
+            conn = self._reader()
+            cursor = conn.cursor()
+            cursor.arraysize = _FETCH_BATCH_SIZE
+            
+            cursor.execute(_SQL_MESSAGES_WITH_CALLS, (conversation_id,))
+            
+            # Rows arrive grouped by message, one per function call
+            message = None
+            for rows in iter(cursor.fetchmany, []):
+                for row in rows:
+                    if message is None or message["id"] != row[0]:
+                        if message is not None:
+                            yield message
+                        message = {
+                            "id": row[0],
+                            "conversation_id": row[1],
+                            "type": row[2],
+                            "content": row[3],
+                            "timestamp": row[4]
+                        }
+                    
+                    if row[5] is not None:
+                        message.setdefault("function_calls", []).append({
+                            "id": row[5],
+                            "message_id": row[0],
+                            "function_name": row[6],
+                            "function_args": row[7],
+                            "function_result": row[8],
+                            "timestamp": row[9]
+                        })
+                
+            if message is not None:
+                yield message
+            
+        except Exception as e:
+            logger.error(f"Error retrieving messages for conversation {conversation_id}: {e}")
+            raise
     
     def get_all_conversations(self) -> List[Dict[str, Any]]:
         """
@@ -322,25 +884,11 @@ class Database:
             A list of dictionaries containing conversation details.
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT id, title, created_at, updated_at FROM conversations 
-                ORDER BY updated_at DESC
-            """)
-            
-            conversations = [dict(row) for row in cursor.fetchall()]
-            
-            # For each conversation, get the count of messages
-            for conv in conversations:
-                cursor.execute("""
-                    SELECT COUNT(*) as message_count FROM messages 
-                    WHERE conversation_id = ?
-                """, (conv["id"],))
-                
-                result = cursor.fetchone()
-                conv["message_count"] = result["message_count"] if result else 0
+            # Count each conversation's messages in the same query
+            conversations = [
+                {"id": r[0], "title": r[1], "created_at": r[2], "updated_at": r[3], "message_count": r[4]}
+                for r in self._fetchall(_SQL_SELECT_CONVERSATIONS)
+            ]
             
             logger.debug(f"Retrieved {len(conversations)} conversations")
             return conversations
@@ -348,8 +896,6 @@ class Database:
         except Exception as e:
             logger.error(f"Error retrieving conversations: {e}")
             return []
-        finally:
-            conn.close()
     
     # Message Methods
     
@@ -364,35 +910,62 @@ class Database:
             
         Returns:
             The ID of the added message.
-        """
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Update conversation's updated_at timestamp
-            now = datetime.now().isoformat()
-            cursor.execute(
-                "UPDATE conversations SET updated_at = ? WHERE id = ?",
-                (now, conversation_id)
-            )
             
-            # Insert the message
-            cursor.execute(
-                "INSERT INTO messages (conversation_id, type, content, timestamp) VALUES (?, ?, ?, ?)",
-                (conversation_id, message_type, content, now)
-            )
+        Raises:
+            sqlite3.IntegrityError: If the conversation does not exist.
+        """
+        with self._lock:
+            try:
+                conn = self._get_connection()
+                with conn:
+                    cursor = conn.cursor()
+                    
+                    # Update conversation's updated_at timestamp
+                    cursor.execute(_SQL_UPDATE_CONV_TS, (conversation_id,))
+                    
+                    # Insert the message
+                    cursor.execute(_SQL_INSERT_MESSAGE, (conversation_id, message_type, content))
+                    
+                    message_id = cursor.lastrowid
+                
+                logger.debug(f"Added {message_type} message {message_id} to conversation {conversation_id}")
+                return message_id
+                
+            except Exception as e:
+                logger.error(f"Error adding message to conversation {conversation_id}: {e}")
+                raise
+    
+    def add_messages_bulk(self, conversation_id: int, messages: List[Tuple[str, str]]) -> List[int]:
+        """
+        Add several messages to a conversation in one transaction.
+        
+        Args:
+            conversation_id: The ID of the conversation to add the messages to.
+            messages: (message_type, content) tuples, in conversation order.
             
-            message_id = cursor.lastrowid
-            conn.commit()
+        Returns:
+            The IDs of the added messages, in order.
+        """
+        try:
+            with self.transaction():
+                conn = self._get_connection()
+                cursor = conn.cursor()
+                
+                message_ids = self._insert_many(
+                    cursor,
+                    _SQL_INSERT_MESSAGE,
+                    [(conversation_id, message_type, content) for message_type, content in messages]
+                )
+                
+                # Update conversation's updated_at timestamp
+                cursor.execute(_SQL_UPDATE_CONV_TS, (conversation_id,))
             
-            logger.debug(f"Added {message_type} message {message_id} to conversation {conversation_id}")
-            return message_id
+            logger.debug(f"Added {len(message_ids)} messages to conversation {conversation_id}")
+            return message_ids
             
         except Exception as e:
-            logger.error(f"Error adding message to conversation {conversation_id}: {e}")
+            logger.error(f"Error adding messages to conversation {conversation_id}: {e}")
             raise
-        finally:
-            conn.close()
     
     def add_function_call(self, message_id: int, function_name: str, function_args: Dict[str, Any], function_result: Dict[str, Any] = None) -> int:
         """
@@ -408,21 +981,14 @@ class Database:
             The ID of the added function call.
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
             # Convert dictionaries to JSON strings
-            args_json = json.dumps(function_args)
-            result_json = json.dumps(function_result) if function_result else None
-            
-            now = datetime.now().isoformat()
-            cursor.execute(
-                "INSERT INTO function_calls (message_id, function_name, function_args, function_result, timestamp) VALUES (?, ?, ?, ?, ?)",
-                (message_id, function_name, args_json, result_json, now)
-            )
+            args_json = _dumps(function_args)
+            result_json = _dumps(function_result) if function_result else None
             
-            call_id = cursor.lastrowid
-            conn.commit()
+            call_id = self._exec(
+                _SQL_INSERT_FUNCTION_CALL,
+                (message_id, function_name, args_json, result_json)
+            ).lastrowid
             
             logger.debug(f"Added function call {call_id} to message {message_id}")
             return call_id
@@ -430,8 +996,44 @@ class Database:
         except Exception as e:
             logger.error(f"Error adding function call to message {message_id}: {e}")
             raise
-        finally:
-            conn.close()
+    
+    def add_function_calls_bulk(self, message_id: int, calls: List[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]]) -> List[int]:
+        """
+        Add several function calls to a message at once.
+        
+        Args:
+            message_id: The ID of the message associated with the function calls.
+            calls: (function_name, function_args, function_result) tuples.
+            
+        Returns:
+            The IDs of the added function calls, in order.
+        """
+        with self._lock:
+            try:
+                conn = self._get_connection()
+                with conn:
+                    cursor = conn.cursor()
+                    
+                    call_ids = self._insert_many(
+                        cursor,
+                        _SQL_INSERT_FUNCTION_CALL,
+                        [
+                            (
+                                message_id,
+                                function_name,
+                                _dumps(function_args),
+                                _dumps(function_result) if function_result else None
+                            )
+                            for function_name, function_args, function_result in calls
+                        ]
+                    )
+                
+                logger.debug(f"Added {len(call_ids)} function calls to message {message_id}")
+                return call_ids
+                
+            except Exception as e:
+                logger.error(f"Error adding function calls to message {message_id}: {e}")
+                raise
     
     def update_function_result(self, call_id: int, function_result: Dict[str, Any]) -> bool:
         """
@@ -445,17 +1047,8 @@ class Database:
             True if the update was successful, False otherwise.
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            result_json = json.dumps(function_result)
-            cursor.execute(
-                "UPDATE function_calls SET function_result = ? WHERE id = ?",
-                (result_json, call_id)
-            )
-            
-            success = cursor.rowcount > 0
-            conn.commit()
+            result_json = _dumps(function_result)
+            success = self._exec(_SQL_UPDATE_FUNCTION_RESULT, (result_json, call_id)).rowcount > 0
             
             if success:
                 logger.debug(f"Updated function call result for call ID: {call_id}")
@@ -467,8 +1060,6 @@ class Database:
         except Exception as e:
             logger.error(f"Error updating function call result {call_id}: {e}")
             return False
-        finally:
-            conn.close()
     
     # Settings Methods
     
@@ -484,26 +1075,16 @@ class Database:
             The setting value, or the default value if not found.
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
-            row = cursor.fetchone()
+            row = self._fetchone(_SQL_GET_SETTING, (key,))
             
             if row:
-                # Try to parse as JSON, fall back to string if not valid JSON
-                try:
-                    return json.loads(row["value"])
-                except json.JSONDecodeError:
-                    return row["value"]
+                return self._decode_setting(key, row)
             else:
                 return default_value
             
         except Exception as e:
             logger.error(f"Error retrieving setting {key}: {e}")
             return default_value
-        finally:
-            conn.close()
     
     def set_setting(self, key: str, value: Any) -> bool:
         """
@@ -511,38 +1092,21 @@ class Database:
         
         Args:
             key: The setting key.
-            value: The setting value (will be converted to JSON).
+            value: The setting value. Booleans, integers, floats and strings
+                are stored as they are; other values are serialized.
             
         Returns:
             True if the setting was set successfully, False otherwise.
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Convert value to JSON string if it's not already a string
-            if not isinstance(value, str):
-                value = json.dumps(value)
-            
-            now = datetime.now().isoformat()
-            cursor.execute(
-                """
-                INSERT INTO settings (key, value, updated_at) 
-                VALUES (?, ?, ?) 
-                ON CONFLICT(key) DO UPDATE SET value = ?, updated_at = ?
-                """,
-                (key, value, now, value, now)
-            )
-            
-            conn.commit()
+            self._exec(_SQL_SET_SETTING, (key,) + _encode_setting(value))
+            self._invalidate_cached(self._settings_cache, key)
             logger.debug(f"Setting {key} set successfully")
             return True
             
         except Exception as e:
             logger.error(f"Error setting setting {key}: {e}")
             return False
-        finally:
-            conn.close()
     
     def delete_setting(self, key: str) -> bool:
         """
@@ -555,13 +1119,8 @@ class Database:
             True if the setting was deleted successfully, False otherwise.
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("DELETE FROM settings WHERE key = ?", (key,))
-            
-            success = cursor.rowcount > 0
-            conn.commit()
+            success = self._exec(_SQL_DELETE_SETTING, (key,)).rowcount > 0
+            self._invalidate_cached(self._settings_cache, key)
             
             if success:
                 logger.debug(f"Setting {key} deleted successfully")
@@ -573,8 +1132,6 @@ class Database:
         except Exception as e:
             logger.error(f"Error deleting setting {key}: {e}")
             return False
-        finally:
-            conn.close()
     
     def get_all_settings(self) -> Dict[str, Any]:
         """
@@ -584,21 +1141,7 @@ class Database:
             A dictionary of all settings.
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT key, value FROM settings")
-            
-            settings = {}
-            for row in cursor.fetchall():
-                key = row["key"]
-                value = row["value"]
-                
-                # Try to parse as JSON, fall back to string if not valid JSON
-                try:
-                    settings[key] = json.loads(value)
-                except json.JSONDecodeError:
-                    settings[key] = value
+            settings = {row[0]: self._decode_setting(row[0], row[1:]) for row in self._fetchall(_SQL_SELECT_SETTINGS)}
             
             logger.debug(f"Retrieved {len(settings)} settings")
             return settings
@@ -606,8 +1149,6 @@ class Database:
         except Exception as e:
             logger.error(f"Error retrieving all settings: {e}")
             return {}
-        finally:
-            conn.close()
     
     # Tool Definition Methods
     
@@ -625,67 +1166,37 @@ class Database:
         Returns:
             True if the tool was saved successfully, False otherwise.
         """
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Check if tool already exists
-            cursor.execute("SELECT id FROM tool_definitions WHERE id = ?", (tool_id,))
-            existing = cursor.fetchone()
-            
-            schema_json = json.dumps(schema)
-            now = datetime.now().isoformat()
-            
-            if existing:
-                # Update existing tool
-                cursor.execute(
-                    """
-                    UPDATE tool_definitions 
-                    SET name = ?, description = ?, schema = ?, enabled = ?, updated_at = ? 
-                    WHERE id = ?
-                    """,
-                    (name, description, schema_json, 1 if enabled else 0, now, tool_id)
-                )
-            else:
-                # Insert new tool
-                cursor.execute(
-                    """
-                    INSERT INTO tool_definitions (id, name, description, schema, enabled, created_at, updated_at) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (tool_id, name, description, schema_json, 1 if enabled else 0, now, now)
-                )
-            
-            # Save version history
-            cursor.execute(
-                """
-                SELECT MAX(version) as latest_version FROM tool_versions WHERE tool_id = ?
-                """,
-                (tool_id,)
-            )
-            row = cursor.fetchone()
-            latest_version = row["latest_version"] if row["latest_version"] is not None else 0
-            
-            # Increment version number
-            new_version = latest_version + 1
-            
-            cursor.execute(
-                """
-                INSERT INTO tool_versions (tool_id, version, schema, created_at) 
-                VALUES (?, ?, ?, ?)
-                """,
-                (tool_id, new_version, schema_json, now)
-            )
-            
-            conn.commit()
-            logger.debug(f"Tool {tool_id} saved successfully (version {new_version})")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error saving tool definition {tool_id}: {e}")
-            return False
-        finally:
-            conn.close()
+        with self._lock:
+            try:
+                conn = self._get_connection()
+                with conn:
+                    cursor = conn.cursor()
+                    
+                    schema_data = _pack(schema)
+                    
+                    # Insert the tool, or update it if it already exists
+                    cursor.execute(
+                        _SQL_UPSERT_TOOL,
+                        (tool_id, name, description, schema_data, 1 if enabled else 0)
+                    )
+                    
+                    # Save version history; the next version number is computed
+                    # by the INSERT itself
+                    cursor.execute(
+                        _SQL_INSERT_TOOL_VERSION,
+                        (tool_id, tool_id, schema_data)
+                    )
+                    if not _HAS_RETURNING:
+                        cursor.execute(_SQL_SELECT_VERSION_BY_ROWID, (cursor.lastrowid,))
+                    new_version = cursor.fetchone()[0]
+                
+                self._invalidate_cached(self._schema_cache, tool_id)
+                logger.debug(f"Tool {tool_id} saved successfully (version {new_version})")
+                return True
+                
+            except Exception as e:
+                logger.error(f"Error saving tool definition {tool_id}: {e}")
+                return False
     
     def get_tool_definition(self, tool_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -698,43 +1209,37 @@ class Database:
             A dictionary containing the tool definition, or None if not found.
         """
         try:
-            conn = self._get_connection()
+            conn = self._reader()
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row  # Return rows as dictionaries
             
-            cursor.execute("SELECT * FROM tool_definitions WHERE id = ?", (tool_id,))
+            cursor.execute(_SQL_SELECT_TOOL_BY_ID, (tool_id,))
             row = cursor.fetchone()
             
             if row:
                 tool = dict(row)
                 
-                # Parse schema JSON
+                # Parse the stored schema
                 try:
-                    tool["schema"] = json.loads(tool["schema"])
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON in tool schema for {tool_id}")
+                    tool["schema"] = self._parse_cached(self._schema_cache, tool["id"], tool["updated_at"], tool["schema"])
+                except ValueError:
+                    logger.warning(f"Invalid stored tool schema for {tool_id}")
                 
                 # Convert enabled to boolean
                 tool["enabled"] = bool(tool["enabled"])
                 
                 # Get version history
-                cursor.execute(
-                    """
-                    SELECT * FROM tool_versions 
-                    WHERE tool_id = ? 
-                    ORDER BY version DESC
-                    """,
-                    (tool_id,)
-                )
+                cursor.execute(_SQL_SELECT_TOOL_VERSIONS, (tool_id,))
                 
                 versions = []
                 for v_row in cursor.fetchall():
                     version = dict(v_row)
                     
-                    # Parse schema JSON for each version
+                    # Parse the schema of each version
                     try:
-                        version["schema"] = json.loads(version["schema"])
-                    except json.JSONDecodeError:
-                        logger.warning(f"Invalid JSON in tool version schema for {tool_id} v{version['version']}")
+                        version["schema"] = _unpack(version["schema"])
+                    except ValueError:
+                        logger.warning(f"Invalid stored tool version schema for {tool_id} v{version['version']}")
                     
                     versions.append(version)
                 
@@ -749,8 +1254,6 @@ class Database:
         except Exception as e:
             logger.error(f"Error retrieving tool definition {tool_id}: {e}")
             return None
-        finally:
-            conn.close()
     
     def delete_tool_definition(self, tool_id: str) -> bool:
         """
@@ -762,63 +1265,69 @@ class Database:
         Returns:
             True if the tool was deleted successfully, False otherwise.
         """
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Delete version history first (due to foreign key constraint)
-            cursor.execute("DELETE FROM tool_versions WHERE tool_id = ?", (tool_id,))
-            
-            # Delete tool definition
-            cursor.execute("DELETE FROM tool_definitions WHERE id = ?", (tool_id,))
-            
-            success = cursor.rowcount > 0
-            conn.commit()
-            
-            if success:
-                logger.debug(f"Deleted tool definition {tool_id}")
-            else:
-                logger.warning(f"No tool definition found with ID: {tool_id}")
-            
-            return success
-            
-        except Exception as e:
-            logger.error(f"Error deleting tool definition {tool_id}: {e}")
-            return False
-        finally:
-            conn.close()
+        with self._lock:
+            try:
+                conn = self._get_connection()
+                with conn:
+                    cursor = conn.cursor()
+                    
+                    # Delete version history first (due to foreign key constraint)
+                    cursor.execute(_SQL_DELETE_TOOL_VERSIONS, (tool_id,))
+                    
+                    # Delete tool definition
+                    cursor.execute(_SQL_DELETE_TOOL, (tool_id,))
+                    
+                    success = cursor.rowcount > 0
+                
+                self._invalidate_cached(self._schema_cache, tool_id)
+                
+                if success:
+                    logger.debug(f"Deleted tool definition {tool_id}")
+                else:
+                    logger.warning(f"No tool definition found with ID: {tool_id}")
+                
+                return success
+                
+            except Exception as e:
+                logger.error(f"Error deleting tool definition {tool_id}: {e}")
+                return False
     
-    def get_all_tool_definitions(self, enabled_only: bool = False) -> List[Dict[str, Any]]:
+    def get_all_tool_definitions(self, enabled_only: bool = False, include_schema: bool = True) -> List[Dict[str, Any]]:
         """
         Get all tool definitions.
         
         Args:
             enabled_only: If True, only return enabled tools.
+            include_schema: If False, leave out the schemas (typically the
+                            largest column), e.g. for list views.
             
         Returns:
             A list of tool definitions.
         """
         try:
-            conn = self._get_connection()
+            conn = self._reader()
             cursor = conn.cursor()
             
-            if enabled_only:
-                cursor.execute("SELECT * FROM tool_definitions WHERE enabled = 1")
-            else:
-                cursor.execute("SELECT * FROM tool_definitions")
+            cursor.execute(_SQL_SELECT_TOOLS[(bool(enabled_only), bool(include_schema))])
             
             tools = []
             for row in cursor.fetchall():
-                tool = dict(row)
-                
-                # Parse schema JSON
-                try:
-                    tool["schema"] = json.loads(tool["schema"])
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON in tool schema for {tool['id']}")
+                tool = {
+                    "id": row[0],
+                    "name": row[1],
+                    "description": row[2],
+                    "enabled": bool(row[3]),
+                    "created_at": row[4],
+                    "updated_at": row[5]
+                }
                 
-                # Convert enabled to boolean
-                tool["enabled"] = bool(tool["enabled"])
+                # Parse the stored schema
+                if include_schema:
+                    try:
+                        tool["schema"] = self._parse_cached(self._schema_cache, tool["id"], tool["updated_at"], row[6])
+                    except ValueError:
+                        tool["schema"] = row[6]
+                        logger.warning(f"Invalid stored tool schema for {tool['id']}")
                 
                 tools.append(tool)
             
@@ -828,8 +1337,6 @@ class Database:
         except Exception as e:
             logger.error(f"Error retrieving tool definitions: {e}")
             return []
-        finally:
-            conn.close()
     
     def get_tool_version(self, tool_id: str, version: int) -> Optional[Dict[str, Any]]:
         """
@@ -843,27 +1350,22 @@ class Database:
             The tool version data, or None if not found.
         """
         try:
-            conn = self._get_connection()
+            conn = self._reader()
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row  # Return rows as dictionaries
             
-            cursor.execute(
-                """
-                SELECT * FROM tool_versions 
-                WHERE tool_id = ? AND version = ?
-                """,
-                (tool_id, version)
-            )
+            cursor.execute(_SQL_SELECT_TOOL_VERSION, (tool_id, version))
             
             row = cursor.fetchone()
             
             if row:
                 version_data = dict(row)
                 
-                # Parse schema JSON
+                # Parse the stored schema
                 try:
-                    version_data["schema"] = json.loads(version_data["schema"])
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON in tool version schema for {tool_id} v{version}")
+                    version_data["schema"] = _unpack(version_data["schema"])
+                except ValueError:
+                    logger.warning(f"Invalid stored tool version schema for {tool_id} v{version}")
                 
                 logger.debug(f"Retrieved version {version} of tool {tool_id}")
                 return version_data
@@ -874,5 +1376,3 @@ class Database:
         except Exception as e:
             logger.error(f"Error retrieving tool version {version} for {tool_id}: {e}")
             return None
-        finally:
-            conn.close()
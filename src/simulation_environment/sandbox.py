@@ -5,20 +5,108 @@ This module provides a safe sandbox environment for testing function implementat
 before they are used in production with the Gemini API.
 """
 
+import atexit
 import json
 import logging
-import subprocess
-import tempfile
 import os
+import subprocess
 import sys
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union, Callable
+from typing import Dict, Any, List, Optional, Tuple, Union, Callable
 import importlib.util
 import threading
 
+from .._sandbox_worker import SandboxWorkerPool
+
+try:
+    import jsonschema
+except ImportError:
+    jsonschema = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+if orjson is not None:
+    def _dumps(obj: Any) -> bytes:
+        """Serialize an object to UTF-8 encoded JSON."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+else:
+    def _dumps(obj: Any) -> bytes:
+        """Serialize an object to UTF-8 encoded JSON."""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+# Test results kept for get_result(), oldest evicted first, and the length
+# their stdout and stderr are cut to; callers of test_function get them whole
+_MAX_STORED_RESULTS = 512
+_MAX_STORED_OUTPUT = 64 * 1024
+
+# Compiled result schema validators kept, oldest evicted first
+_MAX_VALIDATORS = 256
+
+# Fixed parts of a simulated Gemini response, serialized once; only the
+# function name and call are filled in per call
+_SIMULATED_RESPONSE_PREFIX = b'{"candidates":[{"content":{"parts":[{"text":"I\'ll help you with that using the '
+_SIMULATED_RESPONSE_MIDDLE = b' function."}],"role":"model"},"finishReason":"STOP","functionCall":'
+_SIMULATED_RESPONSE_SUFFIX = b'}]}'
+
+# Python types of the JSON schema types checked when jsonschema is missing
+_TYPE_MAP = {
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+def _has_type(value: Any, schema_type: Any) -> bool:
+    """
+    Check a value against a JSON schema type.
+    
+    Args:
+        value: The value to check.
+        schema_type: The "type" of the schema.
+        
+    Returns:
+        False if the value does not have a type listed in _TYPE_MAP, True
+        otherwise, including for types not in _TYPE_MAP.
+    """
+    expected = _TYPE_MAP.get(schema_type) if isinstance(schema_type, str) else None
+    if expected is None:
+        return True
+    
+    # bool is a subclass of int but is not a JSON integer or number
+    if schema_type in ("integer", "number") and isinstance(value, bool):
+        return False
+    return isinstance(value, expected)
+
+class _SandboxWorkerPool(SandboxWorkerPool):
+    """Pool of sandbox workers shared by all function sandboxes."""
+    
+    _instance = None
+    _instance_lock = threading.Lock()
+    
+    @classmethod
+    def get(cls) -> "_SandboxWorkerPool":
+        """
+        Get the shared worker pool, creating it on first use.
+        
+        Returns:
+            The shared _SandboxWorkerPool.
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+                    atexit.register(cls._instance.shutdown)
+        return cls._instance
+
 class FunctionSandbox:
     """
     Sandbox environment for testing function implementations.
@@ -27,15 +115,21 @@ class FunctionSandbox:
     before they are used in production with the Gemini API.
     """
     
-    def __init__(self, timeout: int = 5):
+    def __init__(self, timeout: int = 5, max_results: int = _MAX_STORED_RESULTS):
         """
         Initialize the function sandbox.
         
         Args:
             timeout: Maximum execution time in seconds for functions.
+            max_results: Maximum number of test results kept for get_result().
         """
         self._timeout = timeout
-        self._results = {}
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._max_results = max_results
+        
+        # Compiled validators by id() of their schema, as (schema, validator)
+        # pairs in LRU order; keeping the schema stops its id being reused
+        self._validators: "OrderedDict[int, Tuple[Dict[str, Any], Any]]" = OrderedDict()
         logger.debug(f"FunctionSandbox initialized with timeout: {timeout}s")
     
     def test_function(self, function_code: str, function_name: str, test_args: Dict[str, Any]) -> Dict[str, Any]:
@@ -66,139 +160,32 @@ class FunctionSandbox:
             "stderr": ""
         }
         
-        # Create a temporary file for the function code
+        # Run the function in a process forked from a warm worker, with
+        # timeout; the code is sent inline, so nothing is written to disk
+        start_time = time.time()
         try:
-            with tempfile.NamedTemporaryFile(suffix='.py', delete=False, mode='w') as temp_file:
-                temp_file_path = temp_file.name
-                
-                # Add imports and wrap function code
-                temp_file.write(f"""
-import sys
-import json
-import traceback
-from io import StringIO
-import time
-
-# Capture stdout and stderr
-class CaptureOutput:
-    def __init__(self):
-        self.old_stdout = sys.stdout
-        self.old_stderr = sys.stderr
-        self.stdout = StringIO()
-        self.stderr = StringIO()
-    
-    def __enter__(self):
-        sys.stdout = self.stdout
-        sys.stderr = self.stderr
-        return self
-    
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        sys.stdout = self.old_stdout
-        sys.stderr = self.old_stderr
-
-# The function code provided by the user
-{function_code}
-
-# Execute function with provided arguments
-def _execute_test():
-    try:
-        # Parse arguments from command line
-        args_json = sys.argv[1]
-        args = json.loads(args_json)
-        
-        # Capture output
-        with CaptureOutput() as output:
-            start_time = time.time()
-            result = {function_name}(**args)
-            execution_time = time.time() - start_time
-            
-            # Prepare response
-            response = {{
-                "success": True,
-                "result": result,
-                "error": None,
-                "execution_time": execution_time,
-                "stdout": output.stdout.getvalue(),
-                "stderr": output.stderr.getvalue()
-            }}
-            
-            print(json.dumps(response))
-            
-    except Exception as e:
-        error_msg = str(e)
-        traceback_str = traceback.format_exc()
+            output = _SandboxWorkerPool.get().run(function_code, function_name, test_args, self._timeout)
+            result.update(output)
+            result["execution_time"] = time.time() - start_time
         
-        response = {{
-            "success": False,
-            "result": None,
-            "error": error_msg,
-            "traceback": traceback_str,
-            "execution_time": 0,
-            "stdout": "",
-            "stderr": ""
-        }}
-        
-        print(json.dumps(response))
-
-if __name__ == "__main__":
-    _execute_test()
-""")
-            
-            # Run the function in a subprocess with timeout
-            try:
-                args_json = json.dumps(test_args)
-                start_time = time.time()
-                
-                process = subprocess.Popen(
-                    [sys.executable, temp_file_path, args_json],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                
-                try:
-                    stdout, stderr = process.communicate(timeout=self._timeout)
-                    process_result = process.returncode
-                    execution_time = time.time() - start_time
-                    
-                    if process_result == 0:
-                        # Parse output
-                        try:
-                            output = json.loads(stdout)
-                            result.update(output)
-                            result["execution_time"] = execution_time
-                        except json.JSONDecodeError:
-                            result["error"] = "Failed to parse function output"
-                            result["stdout"] = stdout
-                            result["stderr"] = stderr
-                    else:
-                        result["error"] = f"Function process exited with code {process_result}"
-                        result["stdout"] = stdout
-                        result["stderr"] = stderr
-                
-                except subprocess.TimeoutExpired:
-                    process.kill()
-                    process.communicate()
-                    result["error"] = f"Function execution timed out after {self._timeout} seconds"
-                    result["execution_time"] = self._timeout
-            
-            except Exception as e:
-                result["error"] = f"Error executing function: {str(e)}"
-                logger.error(f"Error executing function '{function_name}': {str(e)}")
+        except subprocess.TimeoutExpired:
+            result["error"] = f"Function execution timed out after {self._timeout} seconds"
+            result["execution_time"] = self._timeout
         
         except Exception as e:
-            result["error"] = f"Error preparing function: {str(e)}"
-            logger.error(f"Error preparing function '{function_name}': {str(e)}")
-        
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_file_path)
-            except Exception as e:
-                logger.warning(f"Failed to remove temporary file {temp_file_path}: {str(e)}")
+            result["error"] = f"Error executing function: {str(e)}"
+            logger.error(f"Error executing function '{function_name}': {str(e)}")
         
-        # Store result for later retrieval
-        self._results[function_name] = result
+        # Store result for later retrieval, with long output cut short
+        stored = result
+        if len(result["stdout"]) > _MAX_STORED_OUTPUT or len(result["stderr"]) > _MAX_STORED_OUTPUT:
+            stored = dict(result)
+            stored["stdout"] = result["stdout"][:_MAX_STORED_OUTPUT]
+            stored["stderr"] = result["stderr"][:_MAX_STORED_OUTPUT]
+        self._results[function_name] = stored
+        self._results.move_to_end(function_name)
+        if len(self._results) > self._max_results:
+            self._results.popitem(last=False)
         logger.debug(f"Function test completed: {result['success']}")
         return result
     
@@ -221,13 +208,17 @@ if __name__ == "__main__":
         }
         
         try:
-            # For proper JSON schema validation, we would use a library like jsonschema
-            # This is a simplified placeholder implementation
-            if schema.get("type") == "object":
-                if not isinstance(result, dict):
-                    validation_result["errors"].append(f"Expected object, got {type(result).__name__}")
-                    return validation_result
-                
+            # Use a compiled validator when jsonschema is installed, otherwise
+            # fall back to checking the basic types
+            if jsonschema is not None:
+                validator = self._get_validator(schema)
+                validation_result["errors"] = [error.message for error in validator.iter_errors(result)]
+            
+            elif not _has_type(result, schema.get("type")):
+                validation_result["errors"].append(f"Expected {schema['type']}, got {type(result).__name__}")
+                return validation_result
+            
+            elif schema.get("type") == "object":
                 # Validate required properties
                 required_props = schema.get("required", [])
                 for prop in required_props:
@@ -241,46 +232,8 @@ if __name__ == "__main__":
                         prop_value = result[prop_name]
                         prop_type = prop_schema.get("type")
                         
-                        if prop_type == "string" and not isinstance(prop_value, str):
-                            validation_result["errors"].append(f"Property '{prop_name}' should be string, got {type(prop_value).__name__}")
-                        
-                        elif prop_type == "number" and not isinstance(prop_value, (int, float)):
-                            validation_result["errors"].append(f"Property '{prop_name}' should be number, got {type(prop_value).__name__}")
-                        
-                        elif prop_type == "integer" and not isinstance(prop_value, int):
-                            validation_result["errors"].append(f"Property '{prop_name}' should be integer, got {type(prop_value).__name__}")
-                        
-                        elif prop_type == "boolean" and not isinstance(prop_value, bool):
-                            validation_result["errors"].append(f"Property '{prop_name}' should be boolean, got {type(prop_value).__name__}")
-                        
-                        elif prop_type == "array" and not isinstance(prop_value, list):
-                            validation_result["errors"].append(f"Property '{prop_name}' should be array, got {type(prop_value).__name__}")
-                        
-                        elif prop_type == "object" and not isinstance(prop_value, dict):
-                            validation_result["errors"].append(f"Property '{prop_name}' should be object, got {type(prop_value).__name__}")
-            
-            elif schema.get("type") == "array":
-                if not isinstance(result, list):
-                    validation_result["errors"].append(f"Expected array, got {type(result).__name__}")
-                    return validation_result
-                
-                # Could add validation for array items here
-            
-            elif schema.get("type") == "string":
-                if not isinstance(result, str):
-                    validation_result["errors"].append(f"Expected string, got {type(result).__name__}")
-            
-            elif schema.get("type") == "number":
-                if not isinstance(result, (int, float)):
-                    validation_result["errors"].append(f"Expected number, got {type(result).__name__}")
-            
-            elif schema.get("type") == "integer":
-                if not isinstance(result, int):
-                    validation_result["errors"].append(f"Expected integer, got {type(result).__name__}")
-            
-            elif schema.get("type") == "boolean":
-                if not isinstance(result, bool):
-                    validation_result["errors"].append(f"Expected boolean, got {type(result).__name__}")
+                        if not _has_type(prop_value, prop_type):
+                            validation_result["errors"].append(f"Property '{prop_name}' should be {prop_type}, got {type(prop_value).__name__}")
             
             # Mark as valid if no errors were found
             validation_result["valid"] = len(validation_result["errors"]) == 0
@@ -291,7 +244,31 @@ if __name__ == "__main__":
         logger.debug(f"Validation result: {validation_result['valid']}")
         return validation_result
     
-    def simulate_gemini_function_call(self, tool_schema: Dict[str, Any], test_args: Dict[str, Any]) -> Dict[str, Any]:
+    def _get_validator(self, schema: Dict[str, Any]) -> "jsonschema.Draft202012Validator":
+        """
+        Get the compiled validator for a schema, building it on first use.
+        
+        Validators are looked up by the schema object, so a schema must not
+        be changed in place after it has been validated against.
+        
+        Args:
+            schema: The JSON schema.
+            
+        Returns:
+            A validator for the schema.
+        """
+        entry = self._validators.get(id(schema))
+        if entry is not None and entry[0] is schema:
+            self._validators.move_to_end(id(schema))
+            return entry[1]
+        
+        validator = jsonschema.Draft202012Validator(schema)
+        self._validators[id(schema)] = (schema, validator)
+        if len(self._validators) > _MAX_VALIDATORS:
+            self._validators.popitem(last=False)
+        return validator
+    
+    def simulate_gemini_function_call(self, tool_schema: Dict[str, Any], test_args: Dict[str, Any], as_bytes: bool = False) -> Union[Dict[str, Any], bytes]:
         """
         Simulate a Gemini function call using the tool schema and test arguments.
         
@@ -301,9 +278,11 @@ if __name__ == "__main__":
         Args:
             tool_schema: The tool schema definition.
             test_args: The test arguments for the function call.
+            as_bytes: If True, return the response serialized as JSON.
             
         Returns:
-            A dictionary resembling a Gemini function call response.
+            A dictionary resembling a Gemini function call response, or its
+            UTF-8 encoded JSON if as_bytes is True.
         """
         logger.debug(f"Simulating Gemini function call for tool: {tool_schema.get('name', 'unknown')}")
         
@@ -316,6 +295,17 @@ if __name__ == "__main__":
             "args": test_args
         }
         
+        # Serialize only the dynamic parts into the pre-serialized skeleton;
+        # the name is embedded in a JSON string, so it is escaped as one
+        if as_bytes:
+            return b"".join((
+                _SIMULATED_RESPONSE_PREFIX,
+                _dumps(function_name)[1:-1],
+                _SIMULATED_RESPONSE_MIDDLE,
+                _dumps(function_call),
+                _SIMULATED_RESPONSE_SUFFIX
+            ))
+        
         # Create a simulated Gemini response
         gemini_response = {
             "candidates": [
@@ -350,7 +340,7 @@ if __name__ == "__main__":
     
     def clear_results(self):
         """Clear all stored test results."""
-        self._results = {}
+        self._results = OrderedDict()
         logger.debug("Cleared all test results")
     
     def set_timeout(self, timeout: int):
@@ -5,14 +5,197 @@ This module handles the lifecycle of function tools, including loading,
 saving, validating, and managing tool definitions.
 """
 
+import copy
+import hashlib
 import json
 import logging
+import mmap
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Set, Tuple, Union
+
+try:
+    import jsonschema
+except ImportError:
+    jsonschema = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Tool files are read and written as bytes, skipping the text layer; orjson's
+# decode errors subclass json.JSONDecodeError, so callers catch either
+if orjson is not None:
+    _loads = orjson.loads
+    
+    def _dumps(obj: Any) -> bytes:
+        """Serialize an object to indented, UTF-8 encoded JSON."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2)
+    
+    def _dumps_canonical(obj: Any) -> bytes:
+        """Serialize an object to compact JSON with sorted keys."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS)
+else:
+    _loads = json.loads
+    
+    def _dumps(obj: Any) -> bytes:
+        """Serialize an object to indented, UTF-8 encoded JSON."""
+        return json.dumps(obj, indent=2).encode()
+    
+    def _dumps_canonical(obj: Any) -> bytes:
+        """Serialize an object to compact JSON with sorted keys."""
+        return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+
+def _copy_json(obj: Any) -> Any:
+    """
+    Deep-copy a JSON-compatible object.
+    
+    With orjson a serialization round trip is faster than copy.deepcopy.
+    
+    Args:
+        obj: The object to copy.
+        
+    Returns:
+        The copy.
+    """
+    if orjson is not None:
+        return orjson.loads(orjson.dumps(obj))
+    return copy.deepcopy(obj)
+
+# Built-in tool templates by template ID; create_tool_from_template returns
+# copies, with the fields in _TEMPLATE_FIELDS overridable
+_TEMPLATE_FIELDS = frozenset({"id", "name", "description", "enabled"})
+_TOOL_TEMPLATES = MappingProxyType({
+    # Example template for a weather tool
+    "weather": {
+        "id": "get_weather",
+        "name": "Get Weather",
+        "description": "Get weather information for a location",
+        "enabled": False,
+        "function": {
+            "name": "get_weather",
+            "description": "Get weather information for a location",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "location": {
+                        "type": "string",
+                        "description": "The location to get weather for, e.g., 'London', 'New York', etc."
+                    },
+                    "units": {
+                        "type": "string",
+                        "enum": ["metric", "imperial"],
+                        "description": "The units to use for temperature and wind speed"
+                    }
+                },
+                "required": ["location"]
+            }
+        }
+    },
+    
+    # Example template for a calculator tool
+    "calculator": {
+        "id": "calculate",
+        "name": "Calculator",
+        "description": "Perform mathematical calculations",
+        "enabled": False,
+        "function": {
+            "name": "calculate",
+            "description": "Perform a mathematical calculation",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "expression": {
+                        "type": "string",
+                        "description": "The mathematical expression to evaluate, e.g., '2 + 2', 'sin(30)', etc."
+                    }
+                },
+                "required": ["expression"]
+            }
+        }
+    }
+})
+
+# Tool files at least this large are parsed straight from a memory map when
+# orjson is available; below it a plain read is cheaper than mapping
+_MMAP_MIN_SIZE = 4 * 1024
+
+# Manifest listing the enabled tool IDs in the storage directory. Toggling a
+# tool rewrites only this file, shortly after the last of a burst of changes
+_ENABLED_MANIFEST = "_enabled.json"
+_MANIFEST_WRITE_DELAY = 0.05
+
+# fdatasync skips flushing metadata such as access times; not every
+# platform has it
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+def _write_all(fd: int, data: bytes):
+    """
+    Write all of the data to a file descriptor.
+    
+    Args:
+        fd: The file descriptor to write to.
+        data: The data to write.
+    """
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def _read_fd(fd: int, size: int) -> bytes:
+    """
+    Read up to size bytes from a file descriptor.
+    
+    Direct os-level reads of a known size skip the buffered file object's
+    terminal probe and second read to find the end.
+    
+    Args:
+        fd: The file descriptor.
+        size: The number of bytes to read.
+        
+    Returns:
+        The bytes read, fewer than size only at end of file.
+    """
+    data = os.read(fd, size)
+    while len(data) < size:
+        chunk = os.read(fd, size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+def _load_json_file(path: Union[str, Path]) -> Any:
+    """
+    Read and parse a JSON file.
+    
+    Large files are mapped and handed to orjson as a memoryview, so the
+    contents are never copied into a bytes object first.
+    
+    Args:
+        path: The path of the file.
+        
+    Returns:
+        The parsed JSON value.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        if orjson is None or size < _MMAP_MIN_SIZE:
+            return _loads(_read_fd(fd, size))
+        
+        with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mapped) as view:
+                return orjson.loads(view)
+    finally:
+        os.close(fd)
+
 class ToolManager:
     """
     Manager for function tools/schemas.
@@ -40,7 +223,25 @@ class ToolManager:
         os.makedirs(self._storage_dir, exist_ok=True)
         
         self._tools: Dict[str, Dict[str, Any]] = {}
-        self._enabled_tools: List[str] = []
+        
+        # Enabled tools by ID, in the order they were enabled. The values are
+        # the same dicts as in _tools, so listing them needs no lookups
+        self._enabled_tools: Dict[str, Dict[str, Any]] = {}
+        
+        # Snapshot returned by get_enabled_tools, dropped on every change
+        self._enabled_view: Optional[Tuple[Dict[str, Any], ...]] = None
+        
+        # Digests of tool definitions (ignoring "enabled") that passed validation
+        self._validated_hashes: Set[bytes] = set()
+        
+        # Parameter schema validators by (tool ID, version), built when the
+        # schema is first checked
+        self._param_validators: Dict[Tuple[str, str], Any] = {}
+        
+        # Pending write of the enabled-tools manifest
+        self._manifest_path = self._storage_dir / _ENABLED_MANIFEST
+        self._manifest_timer: Optional[threading.Timer] = None
+        self._manifest_lock = threading.Lock()
         
         logger.debug(f"ToolManager initialized with storage directory: {self._storage_dir}")
         
@@ -54,28 +255,40 @@ class ToolManager:
         Returns:
             Dict of tool definitions, keyed by tool ID.
         """
+        # Enable/disable changes not written yet would be lost by the reload
+        self.flush()
+        
         try:
-            self._tools = {}
-            tool_files = list(self._storage_dir.glob("*.json"))
-            
-            for tool_file in tool_files:
-                try:
-                    with open(tool_file, "r") as f:
-                        tool_data = json.load(f)
-                    
-                    tool_id = tool_data.get("id") or tool_file.stem
-                    self._tools[tool_id] = tool_data
-                    
-                    # Check if tool is enabled
-                    if tool_data.get("enabled", False):
-                        self._enabled_tools.append(tool_id)
-                    
-                    logger.debug(f"Loaded tool: {tool_id}")
-                
-                except json.JSONDecodeError:
-                    logger.error(f"Error parsing tool file: {tool_file}")
-                except Exception as e:
-                    logger.error(f"Error loading tool file {tool_file}: {e}")
+            # One directory scan; the entry types come with the listing
+            with os.scandir(self._storage_dir) as entries:
+                tool_files = [
+                    entry.path for entry in entries
+                    if entry.name.endswith(".json") and entry.name != _ENABLED_MANIFEST and entry.is_file()
+                ]
+            
+            # Read and parse the files in parallel; results keep file order
+            with ThreadPoolExecutor(max_workers=min(32, len(tool_files) or 1)) as executor:
+                loaded = list(executor.map(self._load_tool_file, tool_files))
+            
+            # Build the new state locally and swap it in at the end
+            tools: Dict[str, Dict[str, Any]] = dict(entry for entry in loaded if entry is not None)
+            
+            # The manifest decides which tools are enabled; tool files saved
+            # before it existed carry their own "enabled" field
+            manifest = self._read_manifest()
+            if manifest is None:
+                manifest = [tool_id for tool_id, tool_data in tools.items() if tool_data.get("enabled", False)]
+            
+            enabled_tools: Dict[str, Dict[str, Any]] = {}
+            for tool_id in manifest:
+                if tool_id in tools:
+                    enabled_tools[tool_id] = tools[tool_id]
+            for tool_id, tool_data in tools.items():
+                tool_data["enabled"] = tool_id in enabled_tools
+            
+            self._tools = tools
+            self._enabled_tools = enabled_tools
+            self._enabled_view = None
             
             logger.info(f"Loaded {len(self._tools)} tools from storage")
             return self._tools
@@ -84,10 +297,70 @@ class ToolManager:
             logger.error(f"Error loading tools: {e}")
             return {}
     
+    def _read_manifest(self) -> Optional[List[str]]:
+        """
+        Read the enabled-tools manifest.
+        
+        Returns:
+            The enabled tool IDs, in the order they were enabled, or None if
+            there is no readable manifest.
+        """
+        try:
+            return _load_json_file(self._manifest_path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error reading enabled tools manifest: {e}")
+            return None
+    
+    def _schedule_manifest_write(self):
+        """Write the enabled-tools manifest shortly, coalescing further changes."""
+        with self._manifest_lock:
+            if self._manifest_timer is None:
+                self._manifest_timer = threading.Timer(_MANIFEST_WRITE_DELAY, self._write_manifest)
+                self._manifest_timer.start()
+    
+    def _write_manifest(self):
+        """Write the enabled-tools manifest now."""
+        with self._manifest_lock:
+            self._manifest_timer = None
+            try:
+                self._write_tool_file(self._manifest_path, _dumps(list(self._enabled_tools)))
+                logger.debug(f"Saved enabled tools manifest ({len(self._enabled_tools)} enabled)")
+            except Exception as e:
+                logger.error(f"Error saving enabled tools manifest: {e}")
+    
+    @staticmethod
+    def _load_tool_file(tool_file: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Load a single tool definition file.
+        
+        Args:
+            tool_file: The path of the tool file.
+            
+        Returns:
+            A (tool_id, tool_data) tuple, or None if the file could not be loaded.
+        """
+        try:
+            tool_data = _load_json_file(tool_file)
+            
+            tool_id = tool_data.get("id") or os.path.basename(tool_file)[:-len(".json")]
+            logger.debug(f"Loaded tool: {tool_id}")
+            return tool_id, tool_data
+        
+        except json.JSONDecodeError:
+            logger.error(f"Error parsing tool file: {tool_file}")
+        except Exception as e:
+            logger.error(f"Error loading tool file {tool_file}: {e}")
+        return None
+    
     def save_tool(self, tool: Dict[str, Any]) -> bool:
         """
         Save a tool definition to storage.
         
+        The file is written to a temporary file, synced and then renamed over
+        the old one, so a crash never leaves a partially written tool.
+        
         Args:
             tool: The tool definition to save.
             
@@ -106,17 +379,20 @@ class ToolManager:
             
             # Save to storage
             file_path = self._storage_dir / f"{tool_id}.json"
-            with open(file_path, "w") as f:
-                json.dump(tool, f, indent=2)
+            self._write_tool_file(file_path, _dumps(tool))
             
             # Update in-memory cache
             self._tools[tool_id] = tool
             
             # Update enabled status
-            if tool.get("enabled", False) and tool_id not in self._enabled_tools:
-                self._enabled_tools.append(tool_id)
-            elif not tool.get("enabled", False) and tool_id in self._enabled_tools:
-                self._enabled_tools.remove(tool_id)
+            was_enabled = tool_id in self._enabled_tools
+            if tool.get("enabled", False):
+                self._enabled_tools[tool_id] = tool
+            else:
+                self._enabled_tools.pop(tool_id, None)
+            self._enabled_view = None
+            if was_enabled != (tool_id in self._enabled_tools):
+                self._schedule_manifest_write()
             
             logger.info(f"Saved tool: {tool_id}")
             return True
@@ -125,6 +401,31 @@ class ToolManager:
             logger.error(f"Error saving tool: {e}")
             return False
     
+    def _write_tool_file(self, file_path: Path, data: bytes):
+        """
+        Write a tool file through a temporary file.
+        
+        Args:
+            file_path: The path of the tool file.
+            data: The file contents.
+        """
+        tmp_path = file_path.with_suffix(".json.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            _write_all(fd, data)
+            _fdatasync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, file_path)
+    
+    def flush(self):
+        """Write a pending change of the enabled-tools manifest now."""
+        with self._manifest_lock:
+            manifest_timer = self._manifest_timer
+        if manifest_timer is not None:
+            manifest_timer.cancel()
+            self._write_manifest()
+    
     def delete_tool(self, tool_id: str) -> bool:
         """
         Delete a tool definition from storage.
@@ -144,10 +445,14 @@ class ToolManager:
                 # Remove from in-memory cache
                 if tool_id in self._tools:
                     del self._tools[tool_id]
+                self._validated_hashes.clear()
+                for key in [key for key in self._param_validators if key[0] == tool_id]:
+                    del self._param_validators[key]
                 
                 # Remove from enabled tools
-                if tool_id in self._enabled_tools:
-                    self._enabled_tools.remove(tool_id)
+                if self._enabled_tools.pop(tool_id, None) is not None:
+                    self._enabled_view = None
+                    self._schedule_manifest_write()
                 
                 logger.info(f"Deleted tool: {tool_id}")
                 return True
@@ -171,28 +476,35 @@ class ToolManager:
         """
         return self._tools.get(tool_id)
     
-    def get_all_tools(self) -> Dict[str, Dict[str, Any]]:
+    def get_all_tools(self) -> Mapping[str, Dict[str, Any]]:
         """
         Get all tool definitions.
         
         Returns:
-            Dict of all tool definitions, keyed by tool ID.
+            Read-only view of all tool definitions, keyed by tool ID.
         """
-        return self._tools
+        return MappingProxyType(self._tools)
     
-    def get_enabled_tools(self) -> List[Dict[str, Any]]:
+    def get_enabled_tools(self) -> Tuple[Dict[str, Any], ...]:
         """
         Get all enabled tool definitions.
         
+        The tuple is built once and reused until the enabled tools change.
+        
         Returns:
-            List of enabled tool definitions.
+            Tuple of enabled tool definitions, in the order they were enabled.
         """
-        return [self._tools[tool_id] for tool_id in self._enabled_tools if tool_id in self._tools]
+        if self._enabled_view is None:
+            self._enabled_view = tuple(self._enabled_tools.values())
+        return self._enabled_view
     
     def enable_tool(self, tool_id: str) -> bool:
         """
         Enable a tool by ID.
         
+        The change is saved through the enabled-tools manifest; the tool file
+        itself is not rewritten.
+        
         Args:
             tool_id: The ID of the tool to enable.
             
@@ -201,15 +513,14 @@ class ToolManager:
         """
         if tool_id in self._tools:
             if tool_id not in self._enabled_tools:
-                self._enabled_tools.append(tool_id)
-                
                 # Update tool definition
                 tool = self._tools[tool_id]
+                self._enabled_tools[tool_id] = tool
+                self._enabled_view = None
                 tool["enabled"] = True
                 
-                # Save updated tool
-                return self.save_tool(tool)
-            return True  # Already enabled
+                self._schedule_manifest_write()
+            return True
         else:
             logger.warning(f"Cannot enable non-existent tool: {tool_id}")
             return False
@@ -218,6 +529,9 @@ class ToolManager:
         """
         Disable a tool by ID.
         
+        The change is saved through the enabled-tools manifest; the tool file
+        itself is not rewritten.
+        
         Args:
             tool_id: The ID of the tool to disable.
             
@@ -226,15 +540,15 @@ class ToolManager:
         """
         if tool_id in self._tools:
             if tool_id in self._enabled_tools:
-                self._enabled_tools.remove(tool_id)
+                del self._enabled_tools[tool_id]
+                self._enabled_view = None
                 
                 # Update tool definition
                 tool = self._tools[tool_id]
                 tool["enabled"] = False
                 
-                # Save updated tool
-                return self.save_tool(tool)
-            return True  # Already disabled
+                self._schedule_manifest_write()
+            return True
         else:
             logger.warning(f"Cannot disable non-existent tool: {tool_id}")
             return False
@@ -250,6 +564,15 @@ class ToolManager:
             bool: True if valid, False otherwise.
         """
         try:
+            # Toggling "enabled" does not change what is validated, so a tool
+            # that only differs from a validated one in that field is accepted
+            digest = hashlib.blake2b(
+                _dumps_canonical({k: v for k, v in tool.items() if k != "enabled"}),
+                digest_size=16
+            ).digest()
+            if digest in self._validated_hashes:
+                return True
+            
             # Basic validation
             required_fields = ["id", "name", "description"]
             for field in required_fields:
@@ -287,8 +610,22 @@ class ToolManager:
                     logger.error("Parameters missing 'type' field")
                     return False
                 
+                # Check the parameters are a valid JSON schema, once per tool
+                # version unless the schema itself changed
+                if jsonschema is not None:
+                    key = (tool["id"], str(tool.get("version", "0")))
+                    validator = self._param_validators.get(key)
+                    if validator is None or validator.schema != parameters:
+                        try:
+                            jsonschema.Draft202012Validator.check_schema(parameters)
+                        except jsonschema.SchemaError as e:
+                            logger.error(f"Function parameters are not a valid JSON schema: {e.message}")
+                            return False
+                        self._param_validators[key] = jsonschema.Draft202012Validator(parameters)
+                
                 # Additional validation could be performed here
             
+            self._validated_hashes.add(digest)
             logger.debug(f"Tool validated successfully: {tool.get('id')}")
             return True
             
@@ -309,60 +646,12 @@ class ToolManager:
         """
         # Placeholder implementation
         # In a real implementation, this would load templates from a separate store
-        
-        # Example template for a weather tool
-        if template_id == "weather":
-            tool = {
-                "id": kwargs.get("id", "get_weather"),
-                "name": kwargs.get("name", "Get Weather"),
-                "description": kwargs.get("description", "Get weather information for a location"),
-                "enabled": kwargs.get("enabled", False),
-                "function": {
-                    "name": "get_weather",
-                    "description": "Get weather information for a location",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "location": {
-                                "type": "string",
-                                "description": "The location to get weather for, e.g., 'London', 'New York', etc."
-                            },
-                            "units": {
-                                "type": "string",
-                                "enum": ["metric", "imperial"],
-                                "description": "The units to use for temperature and wind speed"
-                            }
-                        },
-                        "required": ["location"]
-                    }
-                }
-            }
-            return tool
-        
-        # Example template for a calculator tool
-        elif template_id == "calculator":
-            tool = {
-                "id": kwargs.get("id", "calculate"),
-                "name": kwargs.get("name", "Calculator"),
-                "description": kwargs.get("description", "Perform mathematical calculations"),
-                "enabled": kwargs.get("enabled", False),
-                "function": {
-                    "name": "calculate",
-                    "description": "Perform a mathematical calculation",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "expression": {
-                                "type": "string",
-                                "description": "The mathematical expression to evaluate, e.g., '2 + 2', 'sin(30)', etc."
-                            }
-                        },
-                        "required": ["expression"]
-                    }
-                }
-            }
-            return tool
-        
-        else:
+        template = _TOOL_TEMPLATES.get(template_id)
+        if template is None:
             logger.warning(f"Unknown template ID: {template_id}")
             return None
+        
+        # Copy the template, then apply the overridable top-level fields
+        tool = _copy_json(template)
+        tool.update((key, value) for key, value in kwargs.items() if key in _TEMPLATE_FIELDS)
+        return tool
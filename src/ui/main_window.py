@@ -5,21 +5,315 @@ This module defines the main application window and its components,
 including the chat interface and tool management panels.
 """
 
+import functools
+import html
+import json
 import logging
 import sys
-from typing import Dict, Any, List, Optional
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Placeholder for Qt imports - will be used in the actual implementation
 # from PySide6.QtWidgets import (
 #     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
 #     QTextEdit, QLineEdit, QPushButton, QApplication, QMenu, QMenuBar,
-#     QStatusBar, QTabWidget, QLabel, QScrollArea, QDialog
+#     QStatusBar, QTabWidget, QLabel, QScrollArea, QDialog, QListView,
+#     QStyledItemDelegate
+# )
+# from PySide6.QtCore import (
+#     Qt, Signal, Slot, QTimer, QAbstractListModel, QModelIndex, QMetaObject, Q_ARG
 # )
-# from PySide6.QtCore import Qt, Signal, Slot
-# from PySide6.QtGui import QAction, QIcon
+# from PySide6.QtGui import QAction, QIcon, QColor, QTextDocument
 
 logger = logging.getLogger(__name__)
 
+# Menu bar layout: each menu's title and action texts, None marking a
+# separator. Each menu's actions are built first and added in one call
+_MENUS = (
+    ("&File", ("Settings", None, "Exit")),
+    ("&Tools", ("Manage Functions", "Test Function")),
+    ("&Help", ("About", "Documentation")),
+)
+
+# Formatted chat messages are memoized, except messages longer than this,
+# which are formatted on every call so the cache never holds large strings
+_MAX_CACHED_MESSAGE_LENGTH = 4096
+
+# Static HTML around each chat message; only the escaped text varies
+_USER_MESSAGE_PREFIX = "<p><strong>You:</strong> "
+_GEMINI_MESSAGE_PREFIX = "<p><strong>Gemini:</strong> "
+_MESSAGE_SUFFIX = "</p>"
+
+def _format_message(prefix: str, message: str) -> str:
+    """
+    Format a chat message for display in the chat history.
+    
+    Args:
+        prefix: The HTML opening the message and naming the sender.
+        message: The message text to format.
+        
+    Returns:
+        The formatted message HTML.
+    """
+    if len(message) > _MAX_CACHED_MESSAGE_LENGTH:
+        return _render_message(prefix, message)
+    return _render_message_cached(prefix, message)
+
+def _render_message(prefix: str, message: str) -> str:
+    """Build the HTML of a chat message."""
+    return prefix + html.escape(message) + _MESSAGE_SUFFIX
+
+_render_message_cached = functools.lru_cache(maxsize=512)(_render_message)
+
+# Function call arguments are shown as indented JSON, cut off after the
+# display limit. orjson encodes them in one fast call; the stdlib encoder is
+# run incrementally so huge payloads are never dumped whole
+_ARGUMENTS_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
+_MAX_DISPLAYED_ARGUMENTS = 256 * 1024
+
+def _format_arguments(arguments: Any) -> str:
+    """
+    Encode function call arguments for display.
+    
+    Args:
+        arguments: The function call arguments.
+        
+    Returns:
+        The indented JSON, ending with "..." if it was cut off at
+        _MAX_DISPLAYED_ARGUMENTS characters (UTF-8 bytes with orjson).
+    """
+    if orjson is not None:
+        try:
+            encoded = orjson.dumps(arguments, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Values orjson rejects, such as integers beyond 64 bits, are
+            # left to the stdlib encoder
+            pass
+        else:
+            if len(encoded) <= _MAX_DISPLAYED_ARGUMENTS:
+                return encoded.decode("utf-8")
+            return encoded[:_MAX_DISPLAYED_ARGUMENTS].decode("utf-8", "ignore") + "\n..."
+    
+    chunks: List[str] = []
+    remaining = _MAX_DISPLAYED_ARGUMENTS
+    for chunk in _ARGUMENTS_ENCODER.iterencode(arguments):
+        if len(chunk) > remaining:
+            chunks.append(chunk[:remaining])
+            chunks.append("\n...")
+            break
+        
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return "".join(chunks)
+
+def _format_function_call(function_call: Dict[str, Any]) -> str:
+    """
+    Format a function call for display in the chat history.
+    
+    Args:
+        function_call: The function call information.
+        
+    Returns:
+        The formatted function call HTML.
+    """
+    function_name = html.escape(function_call.get("name", "unknown"))
+    arguments = html.escape(_format_arguments(function_call.get("arguments", {})))
+    return (
+        '<div style="background-color: #f0f0f0; padding: 10px; margin: 5px 0; border-radius: 5px;">'
+        f"<p><strong>Function Call:</strong> {function_name}</p><pre>{arguments}</pre></div>"
+    )
+
+# Function calls are formatted off the GUI thread; their rows show this
+# until the HTML is ready
+_FORMAT_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-format")
+_PENDING_FUNCTION_CALL_HTML = "<p><em>Function call...</em></p>"
+_FAILED_FUNCTION_CALL_HTML = "<p><em>Function call could not be displayed</em></p>"
+
+# Kinds of chat history rows, and the background tint of each
+_USER_ROW = "user"
+_GEMINI_ROW = "gemini"
+_FUNCTION_CALL_ROW = "function_call"
+_ROW_TINTS = {
+    _USER_ROW: "#e8f0fe",
+    _GEMINI_ROW: "#ffffff",
+    _FUNCTION_CALL_ROW: "#f0f0f0",
+}
+
+class ChatHistoryModel:
+    """
+    List model of the chat history, shown by the chat panel's list view.
+    
+    Rows are stored unformatted and turned into HTML the first time they are
+    painted, so appending rows costs the same however long the chat gets and
+    only visible rows are ever laid out. Function calls, whose arguments can
+    be large, are formatted on a worker thread as soon as they are added.
+    """
+    
+    # Placeholder for actual implementation - will subclass QAbstractListModel
+    
+    def __init__(self):
+        """Initialize an empty chat history."""
+        # (kind, payload) per row, and the HTML of rows painted so far
+        self._rows: List[Tuple[str, Any]] = []
+        self._row_html: List[Optional[str]] = []
+        
+        # Guards the rows against formatting workers; the generation changes
+        # on clear() so results for removed rows are dropped
+        self._lock = threading.Lock()
+        self._generation = 0
+    
+    def rowCount(self, parent: Any = None) -> int:
+        """
+        Get the number of rows.
+        
+        Args:
+            parent: The parent index; the model is a flat list.
+            
+        Returns:
+            The number of chat history rows.
+        """
+        return len(self._rows)
+    
+    def append_rows(self, rows: List[Tuple[str, Any]]):
+        """
+        Append rows to the chat history, notifying views once.
+        
+        Args:
+            rows: The (kind, payload) pairs to append.
+        """
+        if not rows:
+            return
+        
+        first = len(self._rows)
+        # self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        with self._lock:
+            self._rows.extend(rows)
+            self._row_html.extend([None] * len(rows))
+            generation = self._generation
+        # self.endInsertRows()
+        
+        for row, (kind, payload) in enumerate(rows, first):
+            if kind == _FUNCTION_CALL_ROW:
+                future = _FORMAT_EXECUTOR.submit(_format_function_call, payload)
+                future.add_done_callback(functools.partial(self._on_row_formatted, generation, row))
+    
+    def _on_row_formatted(self, generation: int, row: int, future: Future):
+        """
+        Store the HTML of a row formatted on a worker thread.
+        
+        Args:
+            generation: The generation the row was added in.
+            row: The row number.
+            future: The finished formatting job.
+        """
+        try:
+            row_html = future.result()
+        except Exception as e:
+            logger.error(f"Error formatting function call: {e}")
+            row_html = _FAILED_FUNCTION_CALL_HTML
+        
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._row_html[row] = row_html
+        
+        # Placeholder for actual implementation - views are told on the GUI thread
+        # QMetaObject.invokeMethod(self, "_notify_row_changed", Qt.QueuedConnection, Q_ARG(int, row))
+    
+    # @Slot(int)
+    # def _notify_row_changed(self, row):
+    #     index = self.index(row)
+    #     self.dataChanged.emit(index, index)
+    
+    def clear(self):
+        """Remove all rows."""
+        # self.beginResetModel()
+        with self._lock:
+            self._rows.clear()
+            self._row_html.clear()
+            self._generation += 1
+        # self.endResetModel()
+    
+    def row_html(self, row: int) -> str:
+        """
+        Get the HTML of a row, formatting it on first use.
+        
+        A function call still being formatted shows a placeholder.
+        
+        Args:
+            row: The row number.
+            
+        Returns:
+            The formatted row HTML.
+        """
+        cached = self._row_html[row]
+        if cached is None:
+            kind, payload = self._rows[row]
+            if kind == _USER_ROW:
+                cached = _format_message(_USER_MESSAGE_PREFIX, payload)
+            elif kind == _GEMINI_ROW:
+                cached = _format_message(_GEMINI_MESSAGE_PREFIX, payload)
+            else:
+                return _PENDING_FUNCTION_CALL_HTML
+            self._row_html[row] = cached
+        return cached
+    
+    def row_tint(self, row: int) -> str:
+        """
+        Get the background tint of a row.
+        
+        Args:
+            row: The row number.
+            
+        Returns:
+            The tint as a hex color.
+        """
+        return _ROW_TINTS[self._rows[row][0]]
+    
+    # def data(self, index, role=Qt.DisplayRole):
+    #     if not index.isValid():
+    #         return None
+    #     if role == Qt.DisplayRole:
+    #         return self.row_html(index.row())
+    #     if role == Qt.BackgroundRole:
+    #         return QColor(self.row_tint(index.row()))
+    #     return None
+
+# Placeholder for actual implementation - paints each row's HTML; only
+# rows in the viewport are ever painted. One QTextDocument is reused for
+# every row rather than built per paint and size query
+# class _ChatRowDelegate(QStyledItemDelegate):
+#     def __init__(self, parent=None):
+#         super().__init__(parent)
+#         self._document = QTextDocument(self)
+#         self._document_key = None
+#     
+#     def _layout(self, index, width):
+#         key = (index.row(), width)
+#         if key != self._document_key:
+#             self._document.setHtml(index.data(Qt.DisplayRole))
+#             self._document.setTextWidth(width)
+#             self._document_key = key
+#         return self._document
+#     
+#     def paint(self, painter, option, index):
+#         document = self._layout(index, option.rect.width())
+#         painter.save()
+#         painter.fillRect(option.rect, index.data(Qt.BackgroundRole))
+#         painter.translate(option.rect.topLeft())
+#         document.drawContents(painter)
+#         painter.restore()
+#     
+#     def sizeHint(self, option, index):
+#         return self._layout(index, option.rect.width()).size().toSize()
+
 class MainWindow:
     """
     Main application window for the Gemini Linux Function Manager.
@@ -32,6 +326,16 @@ class MainWindow:
         """Initialize the main window and its components."""
         logger.debug("Initializing MainWindow")
         
+        # Chat history rows waiting to be added, as (kind, payload) tuples.
+        # They are added together once control returns to the event loop,
+        # so a burst of messages costs a single row insertion
+        self.chat_model = ChatHistoryModel()
+        self._pending_rows: deque = deque()
+        self._flush_scheduled = False
+        
+        # Open non-modal dialogs, referenced here until they finish
+        self._open_dialogs: Set[Any] = set()
+        
         # Placeholder for actual UI implementation
         # self.window = QMainWindow()
         # self.window.setWindowTitle("Gemini Linux Function Manager")
@@ -61,21 +365,17 @@ class MainWindow:
         # Placeholder for actual menu implementation
         # self.menu_bar = self.window.menuBar()
         
-        # File menu
-        # file_menu = self.menu_bar.addMenu("&File")
-        # file_menu.addAction("Settings")
-        # file_menu.addSeparator()
-        # file_menu.addAction("Exit")
-        
-        # Tools menu
-        # tools_menu = self.menu_bar.addMenu("&Tools")
-        # tools_menu.addAction("Manage Functions")
-        # tools_menu.addAction("Test Function")
-        
-        # Help menu
-        # help_menu = self.menu_bar.addMenu("&Help")
-        # help_menu.addAction("About")
-        # help_menu.addAction("Documentation")
+        # for title, entries in _MENUS:
+        #     menu = self.menu_bar.addMenu(title)
+        #     actions = []
+        #     for text in entries:
+        #         action = QAction(self.window)
+        #         if text is None:
+        #             action.setSeparator(True)
+        #         else:
+        #             action.setText(text)
+        #         actions.append(action)
+        #     menu.addActions(actions)
     
     def _setup_chat_panel(self):
         """Set up the chat interface panel."""
@@ -85,9 +385,14 @@ class MainWindow:
         # self.chat_panel = QWidget()
         # chat_layout = QVBoxLayout(self.chat_panel)
         
-        # Chat history area
-        # self.chat_history = QTextEdit()
-        # self.chat_history.setReadOnly(True)
+        # Chat history area, a list view over the chat model
+        # self.chat_history = QListView()
+        # self.chat_history.setModel(self.chat_model)
+        # self._chat_delegate = _ChatRowDelegate(self.chat_history)
+        # self.chat_history.setItemDelegate(self._chat_delegate)
+        # self.chat_history.setUniformItemSizes(False)
+        # self.chat_history.setWordWrap(True)
+        # self.chat_history.setSelectionMode(QListView.NoSelection)
         # chat_layout.addWidget(self.chat_history)
         
         # Message input area
@@ -142,14 +447,43 @@ class MainWindow:
             message: The message text to add.
             is_user: True if this is a user message, False if it's from Gemini.
         """
-        logger.debug(f"Adding {'user' if is_user else 'gemini'} message to chat")
+        logger.debug("Adding %s message to chat", "user" if is_user else "gemini")
         
-        # Placeholder for actual implementation
-        # formatter = self._format_user_message if is_user else self._format_gemini_message
-        # formatted_message = formatter(message)
-        # self.chat_history.append(formatted_message)
+        self._queue_chat_row(_USER_ROW if is_user else _GEMINI_ROW, message)
     
-    def _format_user_message(self, message: str) -> str:
+    def _queue_chat_row(self, kind: str, payload: Any):
+        """
+        Queue a chat history row and flush it.
+        
+        Args:
+            kind: The kind of row.
+            payload: The message text or function call of the row.
+        """
+        self._pending_rows.append((kind, payload))
+        
+        # Placeholder for actual implementation: under Qt the flush waits
+        # for the event loop so a burst of rows is added together. Without
+        # the timer nothing would ever flush, so rows are added right away
+        # if not self._flush_scheduled:
+        #     self._flush_scheduled = True
+        #     QTimer.singleShot(0, self._flush_chat)
+        self._flush_chat()
+    
+    def _flush_chat(self):
+        """Add all pending chat history rows in a single insertion."""
+        self._flush_scheduled = False
+        if not self._pending_rows:
+            return
+        
+        pending = list(self._pending_rows)
+        self._pending_rows.clear()
+        logger.debug("Adding %s chat history rows", len(pending))
+        
+        self.chat_model.append_rows(pending)
+        # self.chat_history.scrollToBottom()
+    
+    @staticmethod
+    def _format_user_message(message: str) -> str:
         """
         Format a user message for display in the chat history.
         
@@ -159,10 +493,10 @@ class MainWindow:
         Returns:
             The formatted message HTML.
         """
-        # Placeholder for actual formatting
-        return f"<p><strong>You:</strong> {message}</p>"
+        return _format_message(_USER_MESSAGE_PREFIX, message)
     
-    def _format_gemini_message(self, message: str) -> str:
+    @staticmethod
+    def _format_gemini_message(message: str) -> str:
         """
         Format a Gemini message for display in the chat history.
         
@@ -172,8 +506,7 @@ class MainWindow:
         Returns:
             The formatted message HTML.
         """
-        # Placeholder for actual formatting
-        return f"<p><strong>Gemini:</strong> {message}</p>"
+        return _format_message(_GEMINI_MESSAGE_PREFIX, message)
     
     def display_function_call(self, function_call: Dict[str, Any]):
         """
@@ -182,36 +515,32 @@ class MainWindow:
         Args:
             function_call: The function call information.
         """
-        logger.debug(f"Displaying function call: {function_call.get('name', 'unknown')}")
-        
-        # Placeholder for actual implementation
-        # function_name = function_call.get("name", "unknown")
-        # arguments = function_call.get("arguments", {})
-        # formatted_args = json.dumps(arguments, indent=2)
+        logger.debug("Displaying function call: %s", function_call.get("name", "unknown"))
         
-        # html = f"""
-        # <div style="background-color: #f0f0f0; padding: 10px; margin: 5px 0; border-radius: 5px;">
-        #     <p><strong>Function Call:</strong> {function_name}</p>
-        #     <pre>{formatted_args}</pre>
-        # </div>
-        # """
-        # self.chat_history.append(html)
+        self._queue_chat_row(_FUNCTION_CALL_ROW, function_call)
     
-    def prompt_for_function_result(self, function_call: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def prompt_for_function_result(
+        self,
+        function_call: Dict[str, Any],
+        on_result: Callable[[Optional[Dict[str, Any]]], None]
+    ):
         """
         Prompt the user for a function result.
         
+        The dialog is non-modal, so the main event loop keeps running while
+        the user types; the result is passed to on_result when it closes.
+        
         Args:
             function_call: The function call information.
-            
-        Returns:
-            The function result provided by the user, or None if cancelled.
+            on_result: Called with the function result provided by the user,
+                or None if cancelled.
         """
-        logger.debug(f"Prompting for function result: {function_call.get('name', 'unknown')}")
+        logger.debug("Prompting for function result: %s", function_call.get("name", "unknown"))
         
         # Placeholder for actual implementation
         # dialog = QDialog(self.window)
         # dialog.setWindowTitle(f"Function: {function_call.get('name', 'unknown')}")
+        # dialog.setModal(False)
         # layout = QVBoxLayout(dialog)
         
         # layout.addWidget(QLabel("Please provide the result for this function:"))
@@ -228,13 +557,18 @@ class MainWindow:
         # cancel_button.clicked.connect(dialog.reject)
         # submit_button.clicked.connect(dialog.accept)
         
-        # if dialog.exec() == QDialog.Accepted:
+        # def on_accepted():
         #     try:
         #         result = json.loads(result_input.toPlainText())
-        #         return result
         #     except json.JSONDecodeError:
-        #         return {"error": "Invalid JSON format"}
-        # return None
+        #         result = {"error": "Invalid JSON format"}
+        #     on_result(result)
+        
+        # dialog.accepted.connect(on_accepted)
+        # dialog.rejected.connect(lambda: on_result(None))
+        # dialog.finished.connect(lambda _: self._open_dialogs.discard(dialog))
+        # self._open_dialogs.add(dialog)
+        # dialog.show()
         
         # Temporary placeholder implementation
-        return {"result": "Placeholder function result"}
+        on_result({"result": "Placeholder function result"})
@@ -0,0 +1,163 @@
+"""
+Unit tests for the AnalyticsManager class.
+"""
+
+import gc
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import weakref
+from unittest.mock import patch
+
+from src.analytics_logging.analytics import AnalyticsManager, EventType
+
+class TestAnalyticsManager(unittest.TestCase):
+    """Test cases for the AnalyticsManager class."""
+    
+    def setUp(self):
+        """Set up test environment before each test."""
+        self.storage_dir = tempfile.mkdtemp()
+        self.analytics = AnalyticsManager(storage_dir=self.storage_dir)
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        self.analytics.close()
+        shutil.rmtree(self.storage_dir)
+    
+    def test_events_are_counted(self):
+        """Test that logged events reach the stats index."""
+        self.assertTrue(self.analytics.log_error("boom"))
+        self.assertTrue(self.analytics.log_function_call("add", {"a": 1}, 0.5, True))
+        
+        counts = self.analytics.get_event_counts()
+        self.assertEqual(counts["app_start"], 1)
+        self.assertEqual(counts["error"], 1)
+        self.assertEqual(counts["function_called"], 1)
+        self.assertEqual(self.analytics.get_function_stats()["add"]["success_count"], 1)
+    
+    def test_unserializable_event_is_rejected(self):
+        """Test that a payload that cannot be encoded fails without stopping the writer."""
+        self.assertFalse(self.analytics.log_event(EventType.ERROR, {"tags": {"a", "b"}}))
+        self.assertTrue(self.analytics.log_error("after"))
+        
+        self.assertEqual(self.analytics.get_event_counts()["error"], 1)
+        self.assertTrue(self.analytics._writer.is_alive())
+    
+    def test_events_after_clear_are_kept(self):
+        """Test that the session keeps logging to a fresh log after clearing."""
+        self.analytics.log_error("before")
+        self.assertTrue(self.analytics.clear_all_data())
+        self.assertEqual(self.analytics.get_event_counts(), {})
+        
+        self.analytics.log_error("after")
+        export_path = os.path.join(self.storage_dir, "export.json")
+        self.assertTrue(self.analytics.export_data(export_path))
+        
+        with open(export_path) as f:
+            events = json.load(f)
+        self.assertEqual([event["data"]["error_message"] for event in events], ["after"])
+        self.assertEqual(self.analytics.get_event_counts(), {"error": 1})
+    
+    def test_short_writes_are_completed(self):
+        """Test that a batch is fully written when writev writes only part of it."""
+        real_writev = os.writev
+        
+        def short_writev(fd, buffers):
+            # Write at most 7 bytes per call
+            data = b"".join(buffers)[:7]
+            return real_writev(fd, [data])
+        
+        with patch("src.analytics_logging.analytics.os.writev", side_effect=short_writev):
+            for i in range(5):
+                self.analytics.log_function_call("add", {"a": i}, 0.1, True)
+            self.analytics.flush()
+        
+        events = list(self.analytics._read_event_file(str(self.analytics._event_log_path)))
+        self.assertEqual([event["data"]["arguments"]["a"] for event in events[1:]], list(range(5)))
+    
+    def test_unusual_execution_times_stay_valid_json(self):
+        """Test that non-float and non-finite execution times are written as valid JSON."""
+        class Seconds(float):
+            def __repr__(self):
+                return f"Seconds({float(self)})"
+        
+        for execution_time in (Seconds(0.5), 2, float("nan"), float("inf")):
+            self.assertTrue(self.analytics.log_function_call("add", {}, execution_time, True))
+        self.analytics.flush()
+        
+        with open(self.analytics._event_log_path) as f:
+            events = [json.loads(line, parse_constant=self.fail) for line in f]
+        self.assertEqual([event.get("et") for event in events[1:]], [0.5, 2.0, None, None])
+        self.assertEqual(self.analytics.get_function_stats()["add"]["total_execution_time"], 2.5)
+    
+    def test_overlapping_sessions_are_archived_in_order(self):
+        """Test that old session logs are merged into their daily archive by time."""
+        self.analytics.close()
+        
+        # Two sessions of the same old day whose events interleave
+        for session_id, timestamps in (("20200101100000", [1, 3, 5]), ("20200101110000", [2, 4])):
+            with open(os.path.join(self.storage_dir, f"events_{session_id}.jsonl"), "w") as f:
+                for ts in timestamps:
+                    f.write(json.dumps({"event_type": "error", "ts": 1577872800 + ts}) + "\n")
+        
+        self.analytics = AnalyticsManager(storage_dir=self.storage_dir)
+        
+        archive_path = os.path.join(self.storage_dir, "daily_20200101.jsonl.gz")
+        events = list(self.analytics._read_event_file(archive_path))
+        self.assertEqual([event["ts"] - 1577872800 for event in events], [1, 2, 3, 4, 5])
+        self.assertEqual(events[1]["session_id"], "20200101110000")
+        self.assertFalse(os.path.exists(os.path.join(self.storage_dir, "events_20200101100000.jsonl")))
+    
+    def test_disabled_manager_creates_no_files(self):
+        """Test that a disabled manager writes nothing until collection is enabled."""
+        self.analytics.close()
+        shutil.rmtree(self.storage_dir)
+        os.mkdir(self.storage_dir)
+        
+        self.analytics = AnalyticsManager(storage_dir=self.storage_dir, enabled=False)
+        self.assertFalse(self.analytics.log_error("ignored"))
+        self.assertEqual(os.listdir(self.storage_dir), [])
+        self.assertIsNone(self.analytics._writer)
+        
+        self.analytics.enabled = True
+        self.assertTrue(self.analytics.log_error("kept"))
+        self.assertEqual(self.analytics.get_event_counts(), {"error": 1})
+        self.assertTrue(os.path.exists(self.analytics._event_log_path))
+    
+    def test_index_scan_parses_unusual_lines(self):
+        """Test that lines the fast patterns cannot place are fully parsed."""
+        events = [
+            # Keys in another order
+            {"event_type": "function_called", "ts": 1.0,
+             "data": {"function_name": "a", "success": False, "arguments": {}, "execution_time": 2.0}},
+            # Trailing key after data
+            {"event_type": "function_called", "ts": 2.0,
+             "data": {"function_name": "b", "arguments": {}, "success": True}, "note": "x"},
+            # Value nested in the arguments only
+            {"event_type": "function_called", "ts": 3.0,
+             "data": {"function_name": "c", "arguments": {"success": True}}},
+        ]
+        file_path = os.path.join(self.storage_dir, "scan.jsonl")
+        with open(file_path, "w") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+        
+        self.assertEqual(list(AnalyticsManager._scan_index_rows(file_path)), [
+            (1.0, "function_called", "a", 0, 2.0),
+            (2.0, "function_called", "b", 1, None),
+            (3.0, "function_called", "c", None, None),
+        ])
+    
+    def test_closed_manager_can_be_collected(self):
+        """Test that closing a manager releases the reference held for exit."""
+        self.analytics.close()
+        ref = weakref.ref(self.analytics)
+        
+        self.analytics = AnalyticsManager(storage_dir=self.storage_dir, enabled=False)
+        gc.collect()
+        self.assertIsNone(ref())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Unit tests for the Database class.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from src.persistence.database import Database
+
+class TestDatabase(unittest.TestCase):
+    """Test cases for the Database class."""
+    
+    def setUp(self):
+        """Set up test environment before each test."""
+        self.db_dir = tempfile.mkdtemp()
+        self.db = Database(os.path.join(self.db_dir, "test.db"))
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        self.db.close()
+        shutil.rmtree(self.db_dir)
+    
+    def test_settings_round_trip(self):
+        """Test that settings keep their types when stored and read back."""
+        values = {"theme": "dark", "count": 5, "flag": True, "ratio": 1.5, "nested": {"a": [1, 2]}}
+        for key, value in values.items():
+            self.assertTrue(self.db.set_setting(key, value))
+        
+        self.assertEqual(self.db.get_all_settings(), values)
+        self.assertIs(self.db.get_setting("flag"), True)
+        self.assertEqual(self.db.get_setting("missing", 7), 7)
+    
+    def test_modifying_setting_does_not_change_cache(self):
+        """Test that changes to a returned setting value are not seen by later reads."""
+        self.db.set_setting("nested", {"a": [1, 2]})
+        
+        for _ in range(2):
+            value = self.db.get_setting("nested")
+            value["a"].append(3)
+            value["b"] = True
+        
+        self.assertEqual(self.db.get_setting("nested"), {"a": [1, 2]})
+    
+    def test_modifying_tool_schema_does_not_change_cache(self):
+        """Test that changes to a returned tool schema are not seen by later reads."""
+        schema = {"type": "object", "properties": {"x": {"type": "number"}}}
+        self.db.save_tool_definition("t1", "Tool", "A tool", schema, True)
+        
+        for _ in range(2):
+            tool = self.db.get_tool_definition("t1")
+            tool["schema"]["properties"]["y"] = {"type": "string"}
+        
+        self.assertEqual(self.db.get_tool_definition("t1")["schema"], schema)
+        self.assertEqual(self.db.get_all_tool_definitions()[0]["schema"], schema)
+    
+    def test_updated_schema_replaces_cached_value(self):
+        """Test that saving a tool definition invalidates its cached schema."""
+        self.db.save_tool_definition("t1", "Tool", "A tool", {"v": 1}, True)
+        self.assertEqual(self.db.get_tool_definition("t1")["schema"], {"v": 1})
+        
+        self.db.save_tool_definition("t1", "Tool", "A tool", {"v": 2}, True)
+        self.assertEqual(self.db.get_tool_definition("t1")["schema"], {"v": 2})
+
+    def test_reader_closed_when_thread_exits(self):
+        """Test that a thread's read connection is closed when the thread exits."""
+        readers = []
+        
+        def read():
+            readers.append(self.db._reader())
+            readers[0].execute("SELECT 1")
+        
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+        
+        with self.assertRaises(sqlite3.ProgrammingError):
+            readers[0].execute("SELECT 1")
+        self.assertEqual(len(self.db._readers), 0)
+    
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""
+Unit tests for the persistent sandbox worker and commands of the local executor.
+"""
+
+import subprocess
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from src.local_executor.executor import ExecutionPermission, LocalExecutor, SandboxWorker
+
+class TestSandboxWorker(unittest.TestCase):
+    """Test cases for the SandboxWorker class."""
+    
+    def setUp(self):
+        """Set up test environment before each test."""
+        self.worker = SandboxWorker(timeout=10)
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        self.worker.stop()
+    
+    def test_execute(self):
+        """Test that a function runs and its result is returned."""
+        response = self.worker.execute("double", "def double(a): return a * 2", {"a": 21})
+        
+        self.assertTrue(response["success"])
+        self.assertEqual(response["result"], 42)
+    
+    def test_output_cannot_forge_responses(self):
+        """Test that writes to the standard streams never reach the protocol."""
+        code = (
+            "import json, os, struct, sys\n"
+            "def noisy():\n"
+            "    body = json.dumps({'id': 1, 'success': True, 'result': 'FORGED'}).encode()\n"
+            "    os.write(1, struct.pack('<I', len(body)) + body)\n"
+            "    sys.__stdout__.write('junk')\n"
+            "    sys.__stdout__.flush()\n"
+            "    os.system('echo from a child; echo to stderr >&2')\n"
+            "    print('printed')\n"
+            "    return 'real'\n"
+        )
+        
+        self.assertEqual(self.worker.execute("noisy", code, {})["result"], "real")
+        
+        # Later calls on the same worker stay in step
+        for i in range(3):
+            response = self.worker.execute("echo", "def echo(a): return a", {"a": i})
+            self.assertEqual(response["result"], i)
+    
+    def test_stdin_is_not_the_request_stream(self):
+        """Test that a function reading stdin cannot consume requests."""
+        code = "import sys\ndef read(): return sys.stdin.read()"
+        
+        self.assertEqual(self.worker.execute("read", code, {})["result"], "")
+        self.assertEqual(self.worker.execute("one", "def one(): return 1", {})["result"], 1)
+    
+    def test_function_cannot_reach_later_calls(self):
+        """Test that frames written to inherited descriptors do not answer later calls."""
+        code = (
+            "import json, os, struct\n"
+            "def forge():\n"
+            "    for job_id in range(1, 10):\n"
+            "        body = json.dumps({'id': job_id, 'status': 'ok', 'exit_code': 0, 'response': {'success': True, 'result': 'FORGED'}}).encode()\n"
+            "        for fd in range(3, 64):\n"
+            "            try:\n"
+            "                os.write(fd, struct.pack('<I', len(body)) + body)\n"
+            "            except OSError:\n"
+            "                pass\n"
+        )
+        
+        # Whatever the function writes can at most become its own result
+        self.worker.execute("forge", code, {})
+        for i in range(3):
+            self.assertEqual(self.worker.execute("echo", "def echo(a): return a", {"a": i})["result"], i)
+    
+    def test_calls_do_not_share_state(self):
+        """Test that modules and builtins changed by one call are not seen by the next."""
+        code = (
+            "import builtins, sys, types\n"
+            "def patch():\n"
+            "    builtins.leaked = True\n"
+            "    sys.modules['leaked'] = types.ModuleType('leaked')\n"
+        )
+        self.worker.execute("patch", code, {})
+        
+        check = "import builtins, sys\ndef check(): return hasattr(builtins, 'leaked') or 'leaked' in sys.modules"
+        self.assertIs(self.worker.execute("check", check, {})["result"], False)
+    
+    def test_timeout_keeps_worker_usable(self):
+        """Test that a call that overruns is stopped and later calls still run."""
+        worker = SandboxWorker(timeout=0.5)
+        try:
+            with self.assertRaises(subprocess.TimeoutExpired):
+                worker.execute("spin", "def spin():\n    while True: pass", {})
+            
+            self.assertEqual(worker.execute("one", "def one(): return 1", {})["result"], 1)
+        finally:
+            worker.stop()
+    
+    def test_crash_is_reported(self):
+        """Test that a function killing its own process raises with the exit code."""
+        with self.assertRaisesRegex(RuntimeError, "exited with code 3"):
+            self.worker.execute("die", "import os\ndef die(): os._exit(3)", {})
+        
+        self.assertEqual(self.worker.execute("one", "def one(): return 1", {})["result"], 1)
+    
+    def test_calls_run_in_parallel(self):
+        """Test that calls from several threads do not wait for each other."""
+        worker = SandboxWorker(timeout=10, size=4)
+        code = "import time\ndef nap(): time.sleep(0.5)"
+        try:
+            # Start the workers before timing
+            threads = [threading.Thread(target=worker.execute, args=("nap", code, {})) for _ in range(4)]
+            start = time.monotonic()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            self.assertLess(time.monotonic() - start, 1.5)
+        finally:
+            worker.stop()
+
+class TestExecuteCommand(unittest.TestCase):
+    """Test cases for LocalExecutor.execute_command."""
+    
+    def setUp(self):
+        """Set up test environment before each test."""
+        self.executor = LocalExecutor(
+            default_permission=ExecutionPermission.FULL,
+            user_confirmation_callback=lambda name, arguments: True
+        )
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        self.executor.close()
+    
+    def test_command_output(self):
+        """Test that a command's output and exit code are reported."""
+        result = self.executor.execute_command("echo {word}; echo oops >&2", {"word": "hello"})
+        self.assertTrue(result["success"])
+        self.assertEqual(result["stdout"], "hello\n")
+        self.assertEqual(result["stderr"], "oops\n")
+        
+        result = self.executor.execute_command("exit 3")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["error"], "Command exited with code 3")
+    
+    def test_timed_out_command_is_cleaned_up(self):
+        """Test that a command that times out is killed and its pipes are closed."""
+        processes = []
+        real_communicate = subprocess.Popen.communicate
+        
+        def communicate(process, timeout=None):
+            # Time out at once instead of after 30 seconds
+            processes.append(process)
+            return real_communicate(process, timeout=0.1)
+        
+        with patch.object(subprocess.Popen, "communicate", communicate):
+            start_time = time.monotonic()
+            result = self.executor.execute_command("exec sleep 60")
+        
+        self.assertEqual(result["error"], "Command execution timed out")
+        self.assertLess(time.monotonic() - start_time, 10)
+        self.assertIsNotNone(processes[0].returncode)
+        self.assertTrue(processes[0].stdout.closed)
+        self.assertTrue(processes[0].stderr.closed)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+"""
+Unit tests for the optional speedup dependencies and their fallbacks.
+
+Every module is also imported with the dependency blocked, so the fallback
+is tested even where the dependency is installed. Tests of a dependency's
+own code path are skipped where it is not installed.
+"""
+
+import importlib
+import importlib.util
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+def installed(package):
+    """Check whether a package can be imported."""
+    return importlib.util.find_spec(package) is not None
+
+def import_without(module_name, *packages):
+    """
+    Import a fresh copy of a module as if some packages were not installed.
+    
+    The modules seen by the rest of the test run are left untouched.
+    
+    Args:
+        module_name: The module to import.
+        packages: The packages to hide from it.
+        
+    Returns:
+        The freshly imported module.
+    """
+    with patch.dict(sys.modules, dict.fromkeys(packages)):
+        sys.modules.pop(module_name, None)
+        return importlib.import_module(module_name)
+
+class OptionalDependencyTestCase(unittest.TestCase):
+    """Base class running checks against a module with and without a dependency."""
+    
+    def setUp(self):
+        """Set up test environment before each test."""
+        self.tmp_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.tmp_dir)
+    
+    def variants(self, module_name, *packages):
+        """
+        Yield the module without the packages, and as installed if they are.
+        
+        Each variant runs as a subtest in its own directory.
+        """
+        modules = [("without " + ", ".join(packages), import_without(module_name, *packages))]
+        if all(installed(package) for package in packages):
+            modules.append(("with " + ", ".join(packages), importlib.import_module(module_name)))
+        
+        for label, module in modules:
+            with self.subTest(label):
+                work_dir = os.path.join(self.tmp_dir, label.replace(" ", "_").replace(",", ""))
+                os.mkdir(work_dir)
+                yield module, work_dir
+
+class TestDatabaseCodecs(OptionalDependencyTestCase):
+    """Test the stored value codecs of the database (orjson, msgpack)."""
+    
+    def test_settings_round_trip(self):
+        """Test that structured settings are stored and read back by every codec."""
+        value = {"a": [1, 2.5, None, True], "b": {"c": "d"}}
+        
+        for module, work_dir in self.variants("src.persistence.database", "orjson", "msgpack"):
+            db_path = os.path.join(work_dir, "test.db")
+            db = module.Database(db_path)
+            self.assertTrue(db.set_setting("nested", value))
+            db.close()
+            
+            db = module.Database(db_path)
+            self.assertEqual(db.get_setting("nested"), value)
+            db.close()
+            
+            with sqlite3.connect(db_path) as conn:
+                stored = conn.execute("SELECT value_json FROM settings WHERE key = 'nested'").fetchone()[0]
+            self.assertIsInstance(stored, str if module.msgpack is None else bytes)
+    
+    @unittest.skipUnless(installed("msgpack"), "msgpack is not installed")
+    def test_json_values_readable_with_msgpack(self):
+        """Test that values written without msgpack stay readable once it is installed."""
+        db_path = os.path.join(self.tmp_dir, "test.db")
+        db = import_without("src.persistence.database", "msgpack").Database(db_path)
+        db.set_setting("nested", {"a": [1, 2]})
+        db.close()
+        
+        db = importlib.import_module("src.persistence.database").Database(db_path)
+        self.assertEqual(db.get_setting("nested"), {"a": [1, 2]})
+        db.close()
+
+class TestAnalyticsCodecs(OptionalDependencyTestCase):
+    """Test the event log encoding of analytics (orjson)."""
+    
+    def test_event_log_is_json_lines(self):
+        """Test that events are written as JSON lines and counted by every codec."""
+        for module, work_dir in self.variants("src.analytics_logging.analytics", "orjson"):
+            analytics = module.AnalyticsManager(storage_dir=work_dir)
+            try:
+                analytics.log_error("boom")
+                analytics.log_function_call("add", {"a": 1, 2: "b"}, 0.5, True)
+                analytics.flush()
+                
+                with open(analytics._event_log_path) as f:
+                    events = [json.loads(line) for line in f]
+                self.assertEqual(len(events), 3)
+                self.assertEqual(events[2]["args"], {"a": 1, "2": "b"})
+                self.assertEqual(analytics.get_function_stats()["add"]["call_count"], 1)
+            finally:
+                analytics.close()
+
+class TestToolManagerCodecs(OptionalDependencyTestCase):
+    """Test the tool files and schema checks of the tool manager (orjson, jsonschema)."""
+    
+    TOOL = {
+        "id": "calculate",
+        "name": "Calculate",
+        "description": "Evaluate an expression",
+        "function": {
+            "name": "calculate",
+            "description": "Evaluate an expression",
+            "parameters": {"type": "object", "properties": {"expression": {"type": "string"}}}
+        }
+    }
+    
+    def test_tool_files_round_trip(self):
+        """Test that tools are saved as JSON and loaded back by every codec."""
+        for module, work_dir in self.variants("src.tool_manager.tool_manager", "orjson"):
+            self.assertTrue(module.ToolManager(work_dir).save_tool(dict(self.TOOL)))
+            
+            with open(os.path.join(work_dir, "calculate.json")) as f:
+                self.assertEqual(json.load(f)["function"], self.TOOL["function"])
+            self.assertEqual(module.ToolManager(work_dir).get_tool("calculate")["name"], "Calculate")
+    
+    def test_invalid_parameter_schema(self):
+        """Test that invalid parameter schemas are only rejected when jsonschema is installed."""
+        tool = json.loads(json.dumps(self.TOOL))
+        tool["function"]["parameters"]["properties"]["expression"]["type"] = 5
+        
+        for module, work_dir in self.variants("src.tool_manager.tool_manager", "jsonschema"):
+            manager = module.ToolManager(work_dir)
+            self.assertEqual(manager.validate_tool(tool), module.jsonschema is None)
+
+class TestUnsafePatternScan(OptionalDependencyTestCase):
+    """Test the unsafe code scan of the local executor (pyahocorasick)."""
+    
+    def test_unsafe_patterns_are_found(self):
+        """Test that unsafe code is flagged and safe code is not by every scanner."""
+        for module, _ in self.variants("src.local_executor.executor", "ahocorasick"):
+            self.assertEqual(module._find_unsafe_pattern("def f(x):\n    return eval(x)\n"), "eval(")
+            self.assertIn(module._find_unsafe_pattern("import subprocess\n"), ("subprocess", "import subprocess"))
+            self.assertIsNone(module._find_unsafe_pattern("def read_weather(city):\n    return city.upper()\n"))
+
+class TestResultValidation(OptionalDependencyTestCase):
+    """Test the result validation of the function sandbox (jsonschema)."""
+    
+    def test_result_type_errors(self):
+        """Test that results of the wrong type are rejected by every validator."""
+        schema = {"type": "object", "required": ["a"], "properties": {"a": {"type": "integer"}}}
+        
+        for module, _ in self.variants("src.simulation_environment.sandbox", "jsonschema"):
+            sandbox = module.FunctionSandbox()
+            self.assertTrue(sandbox.validate_result_against_schema({"a": 1}, schema)["valid"])
+            self.assertFalse(sandbox.validate_result_against_schema({"a": "x"}, schema)["valid"])
+            self.assertFalse(sandbox.validate_result_against_schema({"a": True}, schema)["valid"])
+            self.assertFalse(sandbox.validate_result_against_schema({}, schema)["valid"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Unit tests for the function sandbox and its worker pool.
+"""
+
+import subprocess
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.simulation_environment.sandbox import FunctionSandbox, _SandboxWorkerPool, _has_type
+
+class TestSandboxWorkerPool(unittest.TestCase):
+    """Test cases for the _SandboxWorkerPool class."""
+    
+    def setUp(self):
+        """Set up test environment before each test."""
+        self.pool = _SandboxWorkerPool(size=1)
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        self.pool.shutdown()
+    
+    def test_run(self):
+        """Test that a function runs and its printed output is captured."""
+        code = "def greet(name):\n    print('hello')\n    return f'hi {name}'"
+        response = self.pool.run(code, "greet", {"name": "there"}, 5)
+        
+        self.assertTrue(response["success"])
+        self.assertEqual(response["result"], "hi there")
+        self.assertEqual(response["stdout"], "hello\n")
+    
+    def test_timeout_frees_worker_slot(self):
+        """Test that a caller waiting for a full pool gets a worker after a timeout."""
+        results = []
+        slow_started = threading.Event()
+        
+        def run_slow():
+            slow_started.set()
+            try:
+                self.pool.run("import time\ndef slow(): time.sleep(30)", "slow", {}, 0.5)
+            except subprocess.TimeoutExpired:
+                results.append("timeout")
+        
+        slow = threading.Thread(target=run_slow)
+        slow.start()
+        slow_started.wait()
+        
+        waiter = threading.Thread(target=lambda: results.append(self.pool.run("def one(): return 1", "one", {}, 5)["result"]))
+        waiter.start()
+        
+        slow.join(10)
+        waiter.join(10)
+        self.assertFalse(waiter.is_alive())
+        self.assertCountEqual(results, ["timeout", 1])
+    
+    def test_concurrent_runs_share_pool(self):
+        """Test that concurrent callers are served without exceeding the pool size."""
+        pool = _SandboxWorkerPool(size=2)
+        results = []
+        lock = threading.Lock()
+        
+        def run(i):
+            response = pool.run("def echo(a): return a", "echo", {"a": i}, 5)
+            with lock:
+                results.append(response["result"])
+        
+        try:
+            threads = [threading.Thread(target=run, args=(i,)) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(20)
+            
+            self.assertEqual(sorted(results), list(range(8)))
+            self.assertLessEqual(len(pool._workers), 2)
+        finally:
+            pool.shutdown()
+    
+    def test_fd_output_does_not_corrupt_protocol(self):
+        """Test that writes to fd 1, including from child processes, are dropped."""
+        code = (
+            "import os\n"
+            "def noisy():\n"
+            "    os.system('echo from a child; echo to stderr >&2')\n"
+            "    os.write(1, b'\\xff\\xff\\xff\\xff')\n"
+            "    return 3\n"
+        )
+        
+        self.assertEqual(self.pool.run(code, "noisy", {}, 5)["result"], 3)
+        self.assertEqual(self.pool.run("def one(): return 1", "one", {}, 5)["result"], 1)
+    
+    def test_jobs_do_not_share_state(self):
+        """Test that state left behind by one test is not seen by the next."""
+        self.pool.run("import builtins\ndef patch(): builtins.leaked = True", "patch", {}, 5)
+        
+        check = "import builtins\ndef check(): return hasattr(builtins, 'leaked')"
+        self.assertIs(self.pool.run(check, "check", {}, 5)["result"], False)
+
+class TestHasType(unittest.TestCase):
+    """Test cases for the _has_type schema check."""
+    
+    def test_bool_is_not_a_number(self):
+        """Test that booleans are rejected for numeric types but accepted as booleans."""
+        self.assertFalse(_has_type(True, "integer"))
+        self.assertFalse(_has_type(False, "number"))
+        self.assertTrue(_has_type(True, "boolean"))
+        self.assertTrue(_has_type(1, "number"))
+        self.assertTrue(_has_type(1.5, "number"))
+
+class TestValidateResult(unittest.TestCase):
+    """Test cases for FunctionSandbox.validate_result_against_schema."""
+    
+    def setUp(self):
+        """Set up test environment before each test."""
+        self.sandbox = FunctionSandbox()
+    
+    def test_validator_is_built_once_per_schema(self):
+        """Test that validating against the same schema object reuses its validator."""
+        jsonschema = MagicMock()
+        jsonschema.Draft202012Validator.return_value.iter_errors.return_value = []
+        schema = {"type": "object"}
+        
+        with patch("src.simulation_environment.sandbox.jsonschema", jsonschema):
+            for _ in range(3):
+                self.assertTrue(self.sandbox.validate_result_against_schema({}, schema)["valid"])
+            self.assertEqual(jsonschema.Draft202012Validator.call_count, 1)
+            
+            self.sandbox.validate_result_against_schema({}, {"type": "object"})
+            self.assertEqual(jsonschema.Draft202012Validator.call_count, 2)
+    
+    def test_fallback_checks_types(self):
+        """Test that basic type checks are used without jsonschema."""
+        schema = {"type": "object", "required": ["a"], "properties": {"b": {"type": "integer"}}}
+        
+        with patch("src.simulation_environment.sandbox.jsonschema", None):
+            result = self.sandbox.validate_result_against_schema({"b": "x"}, schema)
+            self.assertFalse(result["valid"])
+            self.assertEqual(result["errors"], [
+                "Missing required property: a",
+                "Property 'b' should be integer, got str"
+            ])
+            self.assertTrue(self.sandbox.validate_result_against_schema({"a": 1, "b": 2}, schema)["valid"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Unit tests for the ToolManager class.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.tool_manager.tool_manager import ToolManager
+
+def make_tool(tool_id, **kwargs):
+    """Build a minimal valid tool definition."""
+    tool = {
+        "id": tool_id,
+        "name": tool_id.title(),
+        "description": f"The {tool_id} tool",
+        "function": {
+            "name": tool_id,
+            "description": f"Run {tool_id}",
+            "parameters": {"type": "object", "properties": {}}
+        }
+    }
+    tool.update(kwargs)
+    return tool
+
+class TestToolManager(unittest.TestCase):
+    """Test cases for the ToolManager class."""
+    
+    def setUp(self):
+        """Set up test environment before each test."""
+        self.storage_dir = tempfile.mkdtemp()
+        self.manager = ToolManager(self.storage_dir)
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        self.manager.flush()
+        shutil.rmtree(self.storage_dir)
+    
+    def test_save_is_atomic(self):
+        """Test that a saved tool replaces its file and leaves no temporary file."""
+        self.assertTrue(self.manager.save_tool(make_tool("calculate")))
+        self.assertTrue(self.manager.save_tool(make_tool("calculate", description="Updated")))
+        
+        self.assertEqual(sorted(os.listdir(self.storage_dir)), ["calculate.json"])
+        reloaded = ToolManager(self.storage_dir)
+        self.assertEqual(reloaded.get_tool("calculate")["description"], "Updated")
+    
+    def test_invalid_tool_is_not_saved(self):
+        """Test that a tool failing validation writes no file."""
+        tool = make_tool("calculate")
+        del tool["function"]
+        
+        self.assertFalse(self.manager.save_tool(tool))
+        self.assertEqual(os.listdir(self.storage_dir), [])
+        self.assertIsNone(self.manager.get_tool("calculate"))
+    
+    def test_enabled_tools_survive_reload(self):
+        """Test that enabled tools are read back from the manifest in enable order."""
+        for tool_id in ("calculate", "search", "weather"):
+            self.manager.save_tool(make_tool(tool_id))
+        self.assertTrue(self.manager.enable_tool("weather"))
+        self.assertTrue(self.manager.enable_tool("calculate"))
+        
+        # Reloading writes the pending manifest first, for this manager and others
+        self.manager.load_tools()
+        self.assertEqual([tool["id"] for tool in self.manager.get_enabled_tools()], ["weather", "calculate"])
+        reloaded = ToolManager(self.storage_dir)
+        self.assertEqual([tool["id"] for tool in reloaded.get_enabled_tools()], ["weather", "calculate"])
+        self.assertTrue(reloaded.get_tool("weather")["enabled"])
+        self.assertFalse(reloaded.get_tool("search")["enabled"])
+        
+        self.assertTrue(reloaded.disable_tool("weather"))
+        reloaded.flush()
+        self.assertEqual([tool["id"] for tool in ToolManager(self.storage_dir).get_enabled_tools()], ["calculate"])
+    
+    def test_tool_files_without_manifest(self):
+        """Test that tool files saved before the manifest existed keep their enabled state."""
+        self.manager.save_tool(make_tool("calculate", enabled=True))
+        self.manager.save_tool(make_tool("search"))
+        self.manager.flush()
+        os.remove(os.path.join(self.storage_dir, "_enabled.json"))
+        
+        reloaded = ToolManager(self.storage_dir)
+        self.assertEqual([tool["id"] for tool in reloaded.get_enabled_tools()], ["calculate"])
+    
+    def test_delete_tool(self):
+        """Test that a deleted tool is gone from storage and memory."""
+        self.manager.save_tool(make_tool("calculate"))
+        
+        self.assertTrue(self.manager.delete_tool("calculate"))
+        self.assertFalse(self.manager.delete_tool("calculate"))
+        self.assertIsNone(self.manager.get_tool("calculate"))
+        self.assertEqual(ToolManager(self.storage_dir).get_all_tools(), {})
+
+if __name__ == "__main__":
+    unittest.main()